@@ -0,0 +1,148 @@
+"""
+Command throughput and event loop lag under concurrent users, with a fixed
+latency injected into every database round trip.
+
+Compares calling the synchronous DB on the event loop, awaiting it through
+SyncDBAdapter, and AsyncDB. The latency is added by a local TCP proxy in
+front of MongoDB, so every backend runs its real queries.
+
+Needs a running MongoDB without credentials, see MONGO_HOST in the README.
+Writes to the "wapo_bench" database, which is dropped afterwards.
+
+Usage: python bench/bench_async_db_load.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from db import DB
+from async_db import AsyncDB, SyncDBAdapter
+
+DB_LATENCY = 0.005  # Seconds added to every round trip
+NR_USERS = 50
+COMMANDS_PER_USER = 10
+
+
+class LatencyProxy:
+    """
+    TCP proxy to MongoDB that holds every chunk for half of DB_LATENCY in
+    each direction. Runs its own event loop in a thread, so a blocked bench
+    loop does not slow it down
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.upstream_port = port
+        self.port = None
+        self.loop = asyncio.new_event_loop()
+
+    def start(self) -> int:
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(ready,), daemon=True).start()
+        ready.wait()
+        return self.port
+
+    def _run(self, ready: threading.Event):
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(
+            self.host, self.upstream_port
+        )
+        await asyncio.gather(
+            self._pipe(reader, upstream_writer), self._pipe(upstream_reader, writer)
+        )
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(DB_LATENCY / 2)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def measure_loop_lag(lags: list, stop: asyncio.Event):
+    # Discord heartbeats and other guilds' commands wait just like this task
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run(command) -> tuple:
+    async def user(player_id: int):
+        for _ in range(COMMANDS_PER_USER):
+            await command(player_id)
+
+    lags = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lags, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(player_id) for player_id in range(NR_USERS)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await lag_task
+    return NR_USERS * COMMANDS_PER_USER / elapsed, max(lags, default=0)
+
+
+async def main():
+    host, _, port = (os.getenv("MONGO_HOST") or "mongo").partition(":")
+    proxy_port = LatencyProxy(host, int(port or 27017)).start()
+    os.environ["MONGO_HOST"] = f"127.0.0.1:{proxy_port}/?directConnection=true"
+
+    db = DB("wapo_bench")
+    async_db = AsyncDB(db)
+    adapter = SyncDBAdapter(db)
+
+    # Like a coin command: load the player, then pay and charge them
+    async def sync_on_loop(player_id: int):
+        db.get_or_create_player(player_id)
+        db.inc_player_coins(player_id, 1)
+        db.inc_player_coins(player_id, -1)
+
+    async def sync_adapter(player_id: int):
+        await adapter.get_or_create_player(player_id)
+        await adapter.inc_player_coins(player_id, 1)
+        await adapter.inc_player_coins(player_id, -1)
+
+    async def async_db_command(player_id: int):
+        await async_db.get_or_create_player(player_id)
+        await async_db.inc_player_coins(player_id, 1)
+        await async_db.inc_player_coins(player_id, -1)
+
+    backends = {
+        "sync DB on loop": sync_on_loop,
+        "SyncDBAdapter": sync_adapter,
+        "AsyncDB": async_db_command,
+    }
+
+    print(
+        f"{NR_USERS} users, {COMMANDS_PER_USER} commands each,"
+        f" {DB_LATENCY * 1000:.0f}ms added per round trip"
+    )
+    print(f"{'backend':18} {'commands/s':>12} {'max loop lag':>14}")
+    for name, command in backends.items():
+        throughput, max_lag = await run(command)
+        print(f"{name:18} {throughput:12.1f} {max_lag * 1000:12.1f}ms")
+
+    db.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
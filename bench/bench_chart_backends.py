@@ -0,0 +1,80 @@
+"""
+Import time, render time and peak RSS of the matplotlib and Pillow chart
+backends. Each backend runs in a fresh process so imports and memory are
+measured from scratch.
+
+Usage: python bench/bench_chart_backends.py
+"""
+
+import os
+import sys
+import time
+import resource
+import multiprocessing
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+NR_PRICES = 720  # A month of hourly prices
+NR_RENDERS = 20
+
+
+def measure(backend: str, results):
+    os.environ["CHART_BACKEND"] = backend
+    os.environ["CHART_FORMAT"] = "png"
+    os.environ.pop("CHART_WIDTH", None)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    import numpy as np
+    import pandas as pd
+    from classes.stock_chart import render_stock_chart
+
+    import_time = time.perf_counter() - start
+
+    index = pd.date_range(datetime(2024, 1, 1), periods=NR_PRICES, freq="H")
+    prices = 100 * np.cumprod(1 + np.random.default_rng(0).normal(0, 0.01, NR_PRICES))
+    df = pd.DataFrame({"Price": prices}, index=index)
+
+    timings = []
+    for _ in range(NR_RENDERS):
+        start = time.perf_counter()
+        chart = render_stock_chart("Bench Incorporated - $BENCH", df)
+        timings.append(time.perf_counter() - start)
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put(
+        (
+            backend,
+            import_time,
+            timings[0],
+            sorted(timings[1:])[len(timings) // 2],
+            len(chart),
+            rss_before,
+            rss_after,
+        )
+    )
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    print(
+        f"{'backend':12} {'import':>8} {'first':>8} {'p50':>8} {'png':>8}"
+        f" {'base RSS':>10} {'peak RSS':>10}"
+    )
+    for backend in ("matplotlib", "pillow"):
+        process = context.Process(target=measure, args=(backend, results))
+        process.start()
+        name, import_time, first, p50, size, rss_before, rss_after = results.get()
+        process.join()
+        print(
+            f"{name:12} {import_time * 1000:6.0f}ms {first * 1000:6.0f}ms"
+            f" {p50 * 1000:6.1f}ms {size / 1024:6.0f}kB"
+            f" {rss_before / 1024:8.1f}MB {rss_after / 1024:8.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Encode time and upload size of a month long stock chart for every chart
+format at a few widths, drawn once with each backend.
+
+Usage: python bench/bench_chart_encoding.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+import numpy as np
+import pandas as pd
+from classes.stock_chart import (
+    CHART_FORMATS,
+    draw_matplotlib_chart,
+    draw_pillow_chart,
+    encode_chart,
+)
+
+NR_PRICES = 720  # A month of hourly prices
+NR_ENCODES = 10
+WIDTHS = (1000, 800, 600)
+
+
+def main():
+    index = pd.date_range(datetime(2024, 1, 1), periods=NR_PRICES, freq="H")
+    prices = 100 * np.cumprod(1 + np.random.default_rng(0).normal(0, 0.01, NR_PRICES))
+    df = pd.DataFrame({"Price": prices}, index=index)
+    title = "Bench Incorporated - $BENCH"
+
+    images = {
+        "matplotlib": draw_matplotlib_chart(title, df),
+        "pillow": draw_pillow_chart(title, df),
+    }
+
+    print(f"{'backend':12} {'format':12} {'width':>6} {'p50':>8} {'size':>8}")
+    for backend, image in images.items():
+        for chart_format in CHART_FORMATS:
+            for width in WIDTHS:
+                timings = []
+                for _ in range(NR_ENCODES):
+                    start = time.perf_counter()
+                    chart = encode_chart(image, chart_format, width)
+                    timings.append(time.perf_counter() - start)
+
+                p50 = sorted(timings)[len(timings) // 2]
+                print(
+                    f"{backend:12} {chart_format:12} {width:6}"
+                    f" {p50 * 1000:6.1f}ms {len(chart) / 1024:6.1f}kB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time to reward 10k players for a completed crossword, comparing the per
+player add_coins + add_modifier loop with the bulk reward_all_players.
+
+Usage: python bench/bench_crossword_reward.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from db import DB
+from schemas.modifier import Modifier
+from schemas.player import Player
+from schemas.player_modifier import PlayerModifier
+
+NR_PLAYERS = 10_000
+REWARD = 10
+
+BOOSTER = Modifier(
+    id="crossword_booster",
+    name="Crossword Booster",
+    description="",
+    symbol="",
+    price=0,
+    is_purchasable=False,
+    is_stacking=False,
+    is_timed=True,
+    duration=24,
+    max_stacks=1,
+)
+
+
+def seed_players():
+    Player.objects.delete()
+    players = []
+    for player_id in range(NR_PLAYERS):
+        player = Player(id=player_id)
+        # Every tenth player has an active booster
+        if player_id % 10 == 0:
+            player.modifiers[BOOSTER.id] = PlayerModifier(
+                id=BOOSTER.id, stacks=1, last_used=datetime.utcnow()
+            )
+        players.append(player.to_mongo())
+    Player._get_collection().insert_many(players)
+
+
+def legacy_reward(db: DB) -> int:
+    players = db.get_players()
+    for player in players:
+        if player.is_modifier_valid(BOOSTER):
+            player.add_coins(round(REWARD * 1.5))
+        else:
+            player.add_coins(REWARD)
+
+    for player in players:
+        player.add_modifier("happy_hour")
+
+    return len(players)
+
+
+def main():
+    db = DB("wapo_bench")
+
+    results = {}
+    for name, reward in [
+        ("per player loop", legacy_reward),
+        (
+            "reward_all_players",
+            lambda d: d.reward_all_players(
+                REWARD, round(REWARD * 1.5), BOOSTER, "happy_hour"
+            ),
+        ),
+    ]:
+        seed_players()
+        start = time.perf_counter()
+        nr_players = reward(db)
+        results[name] = (nr_players, time.perf_counter() - start)
+
+    for name, (nr_players, seconds) in results.items():
+        print(f"{name:20} {nr_players} players in {seconds:.3f}s")
+
+    Player._get_collection().database.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Round trips and latency of PlayerService.get_player, comparing the previous
+count + insert + find path with the single upsert get-or-create.
+
+Half of the lookups are for players that do not exist yet.
+
+Usage: python bench/bench_get_player.py
+"""
+
+import os
+import sys
+import time
+import statistics
+from pymongo import monitoring
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from db import DB
+from schemas.player import Player
+
+NR_LOOKUPS = 2000
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def legacy_get_player(db: DB, player_id: int) -> Player:
+    if not db.has_player(player_id):
+        if db.has_player(player_id):
+            raise ValueError("Player already exists")
+        db.add_player(Player(id=player_id))
+
+    return db.get_player(player_id)
+
+
+def run(db: DB, counter: CommandCounter, get_player, id_offset: int):
+    timings = []
+    counter.count = 0
+    for i in range(NR_LOOKUPS):
+        # Every other lookup is for an already existing player
+        player_id = id_offset + i // 2
+        start = time.perf_counter()
+        get_player(player_id)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return counter.count / NR_LOOKUPS, timings
+
+
+def main():
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    db = DB("wapo_bench")
+    db.delete_all_players()
+
+    results = {
+        "has/add/get": run(db, counter, lambda p: legacy_get_player(db, p), 0),
+        "get_or_create": run(db, counter, db.get_or_create_player, NR_LOOKUPS),
+    }
+
+    print(f"{'path':16} {'round trips':>12} {'p50':>10} {'p99':>10}")
+    for name, (round_trips, timings) in results.items():
+        print(
+            f"{name:16} {round_trips:12.2f} {statistics.median(timings):8.3f}ms"
+            f" {statistics.quantiles(timings, n=100)[98]:8.3f}ms"
+        )
+
+    Player._get_collection().database.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Fetch and render time of a long price history chart, reading every price
+against downsampling to CHART_MAX_POINTS in the database.
+
+Needs a running MongoDB, see MONGO_HOST in the README. Writes to the
+"wapo_bench" database, which is dropped afterwards.
+
+Usage: python bench/bench_history_downsampling.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+import numpy as np
+from db import DB
+from const import CHART_MAX_POINTS
+from classes.stock_sim import StockSim
+from classes.stock_chart import render_stock_chart
+
+TICKER = "BENCH"
+NR_HOURS = 24 * 365 * 2
+
+
+def seed_prices(db: DB):
+    timestamps = np.datetime64(datetime(2000, 1, 1), "us") + np.arange(
+        NR_HOURS
+    ) * np.timedelta64(1, "h")
+    rng = np.random.default_rng(int(os.getenv("WAPO_SEED") or 0))
+    prices = 100 * np.cumprod(1 + rng.normal(0, 0.01, NR_HOURS))
+    db.insert_stock_price_arrays({TICKER: (timestamps, prices)})
+
+
+def measure(fetch, stock_sim: StockSim) -> tuple:
+    start = time.perf_counter()
+    df = stock_sim.stock_prices_to_dataframe(fetch())
+    fetched = time.perf_counter()
+    render_stock_chart(f"${TICKER}", df)
+    rendered = time.perf_counter()
+    return len(df), fetched - start, rendered - fetched
+
+
+def main():
+    db = DB("wapo_bench")
+    stock_sim = StockSim()
+    db.delete_all_stock_prices()
+    seed_prices(db)
+
+    results = {
+        "every price": measure(lambda: db.get_stock_price_history(TICKER), stock_sim),
+        "downsampled": measure(
+            lambda: db.get_downsampled_stock_prices(TICKER, CHART_MAX_POINTS),
+            stock_sim,
+        ),
+    }
+
+    print(f"{'path':12} {'points':>8} {'fetch':>10} {'render':>10}")
+    for name, (nr_points, fetch_time, render_time) in results.items():
+        print(
+            f"{name:12} {nr_points:8} {fetch_time * 1000:8.0f}ms"
+            f" {render_time * 1000:8.0f}ms"
+        )
+
+    db.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    main()
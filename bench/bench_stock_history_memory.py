@@ -0,0 +1,68 @@
+"""
+Peak memory of turning a long price history into a DataFrame, comparing
+list() materialisation with streaming into preallocated buffers.
+
+Usage: python bench/bench_stock_history_memory.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from db import DB
+from schemas.stock_price import StockPrice
+from classes.stock_sim import StockSim
+
+NR_PRICES = 200_000
+TICKER = "BENCH"
+
+
+def seed_prices(db: DB):
+    start = datetime(2000, 1, 1)
+    db.add_stock_prices(
+        StockPrice(ticker=TICKER, timestamp=start + timedelta(hours=i), price=100)
+        for i in range(NR_PRICES)
+    )
+
+
+def measure(build_frame) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = build_frame()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(df), elapsed, peak
+
+
+def main():
+    db = DB("wapo_bench")
+    stock_sim = StockSim()
+    db.delete_all_stock_prices()
+    seed_prices(db)
+
+    results = {
+        "list()": measure(
+            lambda: stock_sim.stock_prices_to_dataframe(
+                db.get_stock_price_history(TICKER)
+            )
+        ),
+        "streamed": measure(
+            lambda: stock_sim.stock_prices_to_dataframe(
+                db.iter_stock_price_history(TICKER), db.count_stock_prices(TICKER)
+            )
+        ),
+    }
+
+    print(f"{'path':10} {'rows':>8} {'time':>8} {'peak memory':>14}")
+    for name, (rows, elapsed, peak) in results.items():
+        print(f"{name:10} {rows:8} {elapsed:7.2f}s {peak / 2**20:12.1f}MB")
+
+    StockPrice._get_collection().database.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    main()
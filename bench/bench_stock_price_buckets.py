@@ -0,0 +1,155 @@
+"""
+Storage size and read latency of one document per price in stock_prices
+against day buckets in stock_price_buckets, on the same synthetic history.
+Also times migrate_stock_prices moving the history between the two.
+
+Needs a running MongoDB, see MONGO_HOST in the README. Writes to the
+"wapo_bench" database, which is dropped afterwards.
+
+Usage: python bench/bench_stock_price_buckets.py
+"""
+
+import os
+import sys
+import time
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from db import DB
+from rng import get_random, set_seed
+from schemas.stock_price import StockPrice
+from schemas.stock_price_bucket import StockPriceBucket
+
+NR_TICKERS = 20
+NR_HOURS = 24 * 365 * 2  # Two years of hourly prices per ticker
+NR_QUERIES = 50
+CHUNK_SIZE = 50_000
+
+
+def seed_legacy_prices(collection) -> datetime:
+    start = datetime(2000, 1, 1)
+    rows = []
+    for i in range(NR_TICKERS):
+        for hour in range(NR_HOURS):
+            rows.append(
+                {
+                    "ticker": f"T{i}",
+                    "timestamp": start + timedelta(hours=hour),
+                    "price": get_random("bench").randint(1, 1000),
+                }
+            )
+            if len(rows) == CHUNK_SIZE:
+                collection.insert_many(rows, ordered=False)
+                rows = []
+    if rows:
+        collection.insert_many(rows, ordered=False)
+
+    return start + timedelta(hours=NR_HOURS)
+
+
+def get_storage(document) -> dict:
+    collection = document._get_collection()
+    stats = collection.database.command("collStats", collection.name)
+    return {
+        "documents": stats["count"],
+        "data": stats["size"],
+        "storage": stats["storageSize"],
+        "indexes": stats["totalIndexSize"],
+    }
+
+
+def time_query(query) -> list:
+    rng = get_random("bench")
+    timings = []
+    for _ in range(NR_QUERIES):
+        ticker = f"T{rng.randrange(NR_TICKERS)}"
+        start = time.perf_counter()
+        query(ticker)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_legacy_queries(end: datetime) -> dict:
+    # The per-row queries DB ran before prices were bucketed
+    day = end - timedelta(days=3)
+    week_start = end - timedelta(days=7)
+    return {
+        "current price": time_query(
+            lambda t: StockPrice.objects(ticker=t).order_by("-timestamp").first()
+        ),
+        "price at": time_query(
+            lambda t: StockPrice.objects(ticker=t, timestamp__lte=day)
+            .order_by("-timestamp")
+            .first()
+        ),
+        "one week range": time_query(
+            lambda t: list(
+                StockPrice.objects(
+                    ticker=t, timestamp__gte=week_start, timestamp__lte=end
+                ).order_by("timestamp")
+            )
+        ),
+        "full history": time_query(
+            lambda t: list(StockPrice.objects(ticker=t).order_by("timestamp"))
+        ),
+    }
+
+
+def run_bucket_queries(db: DB, end: datetime) -> dict:
+    day = end - timedelta(days=3)
+    week_start = end - timedelta(days=7)
+    return {
+        "current price": time_query(db.get_current_stock_price),
+        "price at": time_query(lambda t: db.get_stock_price_at(t, day)),
+        "one week range": time_query(
+            lambda t: db.get_stock_price_in_date_range(t, week_start, end)
+        ),
+        "full history": time_query(db.get_stock_price_history),
+    }
+
+
+def main():
+    set_seed(int(os.getenv("WAPO_SEED") or 0))
+    db = DB("wapo_bench")
+    StockPrice.drop_collection()
+    StockPriceBucket.drop_collection()
+    StockPrice.ensure_indexes()
+    StockPriceBucket.ensure_indexes()
+
+    print(f"Seeding {NR_TICKERS * NR_HOURS} stock prices...")
+    end = seed_legacy_prices(StockPrice._get_collection())
+
+    start = time.perf_counter()
+    migrated = db.migrate_stock_prices()
+    print(f"Migrated {migrated} prices in {time.perf_counter() - start:.1f}s\n")
+
+    legacy, buckets = get_storage(StockPrice), get_storage(StockPriceBucket)
+    print(f"{'storage':10} {'rows':>12} {'buckets':>12}")
+    for name in legacy:
+        unit, scale = ("", 1) if name == "documents" else ("MB", 2**20)
+        print(
+            f"{name:10} {legacy[name] / scale:10.1f}{unit:2}"
+            f" {buckets[name] / scale:10.1f}{unit:2}"
+        )
+
+    before = run_legacy_queries(end)
+    after = run_bucket_queries(db, end)
+
+    print(
+        f"\n{'query':16} {'p50 rows':>12} {'p50 buckets':>12}"
+        f" {'p99 rows':>12} {'p99 buckets':>12}"
+    )
+    for name in before:
+        b, a = before[name], after[name]
+        p99_b, p99_a = (statistics.quantiles(t, n=100)[98] for t in (b, a))
+        print(
+            f"{name:16} {statistics.median(b):10.2f}ms {statistics.median(a):10.2f}ms"
+            f" {p99_b:10.2f}ms {p99_a:10.2f}ms"
+        )
+
+    db.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    main()
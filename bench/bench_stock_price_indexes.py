@@ -0,0 +1,114 @@
+"""
+Query latency of the hot stock price queries on a synthetic 1M row price
+history, with and without the indexes declared on StockPriceBucket.
+
+Needs a running MongoDB, see MONGO_HOST in the README. Writes to the
+"wapo_bench" database, which is dropped afterwards.
+
+Usage: python bench/bench_stock_price_indexes.py
+"""
+
+import os
+import sys
+import time
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from db import DB
+from rng import get_random, set_seed
+from schemas.stock_price_bucket import StockPriceBucket
+
+NR_TICKERS = 20
+NR_HOURS = 50_016  # 20 tickers * 50k hours = 1M prices, in whole days
+NR_QUERIES = 50
+CHUNK_SIZE = 5_000  # Buckets per insert
+
+
+def seed_prices(collection):
+    start = datetime(2000, 1, 1)
+    buckets = []
+    for i in range(NR_TICKERS):
+        for day in range(NR_HOURS // 24):
+            day_start = start + timedelta(days=day)
+            timestamps = [day_start + timedelta(hours=hour) for hour in range(24)]
+            prices = [get_random("bench").randint(1, 1000) for _ in range(24)]
+            buckets.append(
+                {
+                    "ticker": f"T{i}",
+                    "day": day_start,
+                    "count": 24,
+                    "first_timestamp": timestamps[0],
+                    "last_timestamp": timestamps[-1],
+                    "open": prices[0],
+                    "high": max(prices),
+                    "low": min(prices),
+                    "close": prices[-1],
+                    "timestamps": timestamps,
+                    "prices": prices,
+                }
+            )
+            if len(buckets) == CHUNK_SIZE:
+                collection.insert_many(buckets, ordered=False)
+                buckets = []
+    if buckets:
+        collection.insert_many(buckets, ordered=False)
+
+    return start + timedelta(hours=NR_HOURS)
+
+
+def time_query(query) -> list:
+    rng = get_random("bench")
+    timings = []
+    for _ in range(NR_QUERIES):
+        ticker = f"T{rng.randrange(NR_TICKERS)}"
+        start = time.perf_counter()
+        query(ticker)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_queries(db: DB, end: datetime) -> dict:
+    day = end - timedelta(days=3)
+    week_start = end - timedelta(days=7)
+    return {
+        "get_current_stock_price": time_query(db.get_current_stock_price),
+        "get_stock_price_at": time_query(lambda t: db.get_stock_price_at(t, day)),
+        "get_stock_price_in_date_range": time_query(
+            lambda t: db.get_stock_price_in_date_range(t, week_start, end)
+        ),
+    }
+
+
+def main():
+    set_seed(int(os.getenv("WAPO_SEED") or 0))
+    db = DB("wapo_bench")
+    collection = StockPriceBucket._get_collection()
+    collection.drop()
+
+    print(f"Seeding {NR_TICKERS * NR_HOURS} stock prices...")
+    end = seed_prices(collection)
+
+    collection.drop_indexes()
+    before = run_queries(db, end)
+
+    StockPriceBucket.ensure_indexes()
+    after = run_queries(db, end)
+
+    print(
+        f"{'query':32} {'p50 before':>12} {'p50 after':>12}"
+        f" {'p99 before':>12} {'p99 after':>12}"
+    )
+    for name in before:
+        b, a = before[name], after[name]
+        p99_b, p99_a = (statistics.quantiles(t, n=100)[98] for t in (b, a))
+        print(
+            f"{name:32} {statistics.median(b):10.2f}ms {statistics.median(a):10.2f}ms"
+            f" {p99_b:10.2f}ms {p99_a:10.2f}ms"
+        )
+
+    collection.database.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Time to seed 30 days of hourly prices for 50 tickers, comparing a document
+per row saved one at a time with columnar conversion and bulk inserts.
+
+Needs a running MongoDB, see MONGO_HOST in the README. Writes to the
+"wapo_bench" database, which is dropped afterwards.
+
+Usage: python bench/bench_stock_seeding.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from db import DB
+from rng import set_seed
+from schemas.stock_price import StockPrice
+from classes.stock_sim import StockSim
+from classes.return_stats import RunningMoments
+
+NR_TICKERS = 50
+DAYS_BACK = 30
+
+
+def simulate_frames(stock_sim: StockSim) -> dict:
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=DAYS_BACK)
+    moments = RunningMoments(count=100, mean=0.0, m2=0.04)
+    return {
+        f"T{i}": stock_sim.simulate_prices(100, moments, start_date, end_date)
+        for i in range(NR_TICKERS)
+    }
+
+
+def seed_row_by_row(db: DB, frames: dict):
+    # The iterrows conversion and per-price save used before
+    for ticker, df in frames.items():
+        for timestamp, row in df.iterrows():
+            db.add_stock_price(
+                StockPrice(ticker=ticker, timestamp=timestamp, price=row["Price"])
+            )
+
+
+def seed_columnar(db: DB, stock_sim: StockSim, frames: dict):
+    db.insert_stock_price_arrays(
+        {ticker: stock_sim.dataframe_to_arrays(df) for ticker, df in frames.items()}
+    )
+
+
+def measure(db: DB, seed) -> float:
+    db.delete_all_stock_prices()
+    start = time.perf_counter()
+    seed()
+    return time.perf_counter() - start
+
+
+def main():
+    set_seed(int(os.getenv("WAPO_SEED") or 0))
+    db = DB("wapo_bench")
+    stock_sim = StockSim()
+    frames = simulate_frames(stock_sim)
+    nr_prices = sum(len(df) for df in frames.values())
+
+    results = {
+        "row by row": measure(db, lambda: seed_row_by_row(db, frames)),
+        "columnar": measure(db, lambda: seed_columnar(db, stock_sim, frames)),
+    }
+
+    print(f"Seeding {nr_prices} prices for {NR_TICKERS} tickers")
+    print(f"{'path':12} {'time':>8} {'prices/s':>12}")
+    for name, elapsed in results.items():
+        print(f"{name:12} {elapsed:7.2f}s {nr_prices / elapsed:12.0f}")
+
+    db.client.drop_database("wapo_bench")
+
+
+if __name__ == "__main__":
+    main()
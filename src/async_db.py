@@ -0,0 +1,308 @@
+import asyncio
+import datetime
+import functools
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from db import (
+    BUCKET_FIELDS,
+    PRICE_AT_FIELDS,
+    DB,
+    InsufficientCoinsError,
+    PlayerNotFoundError,
+)
+from schemas.player import Player
+from schemas.crossword import Crossword
+from schemas.roulette import Roulette
+from schemas.horse_race import HorseRace
+from schemas.stock import Stock
+from schemas.stock_price import StockPrice
+from schemas.stock_price_bucket import StockPriceBucket
+from schemas.item import Item
+from schemas.modifier import Modifier
+
+BUCKET_PROJECTION = {field: 1 for field in BUCKET_FIELDS}
+PRICE_AT_PROJECTION = {field: 1 for field in PRICE_AT_FIELDS}
+
+
+class SyncDBAdapter:
+    """
+    Exposes every method of a synchronous DB as a coroutine that runs in a
+    worker thread, so callers can await it without blocking the event loop
+    """
+
+    def __init__(self, db: DB):
+        self.db = db
+
+    def __getattr__(self, name: str):
+        method = getattr(self.db, name)
+
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def run_in_thread(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return run_in_thread
+
+
+class AsyncDB:
+    """
+    Motor database instance with the same methods as DB, as coroutines
+
+    Methods that are not implemented on Motor yet fall back to the
+    synchronous DB through a SyncDBAdapter
+    """
+
+    def __init__(self, db: DB):
+        self.client = AsyncIOMotorClient(DB.get_mongo_uri())
+        # Use the same database the MongoEngine connection was opened on
+        self.database = self.client[Player._get_db().name]
+        self.fallback = SyncDBAdapter(db)
+
+    def __getattr__(self, name: str):
+        return getattr(self.fallback, name)
+
+    def _collection(self, document):
+        return self.database[document._meta["collection"]]
+
+    async def _find(
+        self,
+        document,
+        query: dict,
+        skip: int = 0,
+        limit: int = 0,
+        sort=None,
+        fields: List[str] = None,
+    ):
+        cursor = self._find_cursor(document, query, skip, limit, sort, fields)
+        return [document._from_son(son) async for son in cursor]
+
+    def _find_cursor(
+        self, document, query: dict, skip=0, limit=0, sort=None, fields=None
+    ):
+        projection = None
+        if fields:
+            projection = {document._fields[f].db_field: 1 for f in fields}
+
+        return self._collection(document).find(
+            query, projection, skip=skip, limit=limit, sort=sort
+        )
+
+    async def _find_one(self, document, query: dict, sort=None):
+        son = await self._collection(document).find_one(query, sort=sort)
+        return document._from_son(son) if son else None
+
+    async def _count(self, document, query: dict) -> int:
+        return await self._collection(document).count_documents(query, limit=1)
+
+    async def _insert(self, document) -> str:
+        document.validate()
+        result = await self._collection(document).insert_one(document.to_mongo())
+        document.id = result.inserted_id
+        document._created = False
+        return str(result.inserted_id)
+
+    # --- Player helper methods ---
+
+    async def get_player(self, player_id: int) -> Player:
+        return await self._find_one(Player, {"_id": player_id})
+
+    async def get_or_create_player(self, player_id: int) -> Player:
+        collection = self._collection(Player)
+        try:
+            player_son = await collection.find_one_and_update(
+                {"_id": player_id},
+                DB._player_defaults_update(player_id),
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            player_son = await collection.find_one({"_id": player_id})
+
+        return Player._from_son(player_son)
+
+    async def get_players(
+        self, skip: int = 0, limit: int = 0, fields: List[str] = None
+    ) -> List[Player]:
+        return await self._find(Player, {}, skip, limit, fields=fields)
+
+    async def get_players_as_dicts(
+        self, fields: List[str], skip: int = 0, limit: int = 0
+    ) -> List[dict]:
+        cursor = self._find_cursor(Player, {}, skip, limit, fields=fields)
+        return await cursor.to_list(length=None)
+
+    async def inc_player_coins(self, player_id: int, amount: int) -> Optional[int]:
+        player_son = await self._collection(Player).find_one_and_update(
+            DB._coins_query(player_id, amount),
+            {"$inc": {"coins": amount}},
+            projection={"coins": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return player_son["coins"] if player_son else None
+
+    async def settle_player_coins(self, deltas: Dict[int, int]) -> Dict[int, int]:
+        deltas = {player_id: delta for player_id, delta in deltas.items() if delta}
+
+        if len(deltas) > 1 and min(deltas.values()) < 0:
+            # Transactions and staged transfers run on the synchronous client
+            return await self.fallback.settle_player_coins(deltas)
+
+        balances = {}
+        for player_id, delta in deltas.items():
+            balance = await self.inc_player_coins(player_id, delta)
+
+            if balance is None:
+                if not await self.has_player(player_id):
+                    raise PlayerNotFoundError(player_id)
+                raise InsufficientCoinsError("Not enough coins")
+
+            balances[player_id] = balance
+        return balances
+
+    async def reward_all_players(
+        self,
+        amount: int,
+        boosted_amount: int,
+        boost_modifier: Modifier,
+        grant_modifier_id: str,
+    ) -> int:
+        operations = DB._reward_operations(
+            amount, boosted_amount, boost_modifier, grant_modifier_id
+        )
+        result = await self._collection(Player).bulk_write(operations)
+        return result.matched_count
+
+    async def add_player(self, player: Player) -> str:
+        return await self._insert(player)
+
+    async def has_player(self, player_id: int) -> bool:
+        return await self._count(Player, {"_id": player_id}) > 0
+
+    async def delete_player(self, player_id: int) -> None:
+        await self._collection(Player).delete_one({"_id": player_id})
+
+    # --- Item helper methods ---
+
+    async def get_item(self, item_id: str) -> Item:
+        return await self._find_one(Item, {"_id": item_id})
+
+    async def get_items(
+        self, skip: int = 0, limit: int = 0, fields: List[str] = None
+    ) -> List[Item]:
+        return await self._find(Item, {}, skip, limit, fields=fields)
+
+    async def has_item(self, item_id: str) -> bool:
+        return await self._count(Item, {"_id": item_id}) > 0
+
+    # --- Modifier helper methods ---
+
+    async def get_modifier(self, modifier_id: str) -> Modifier:
+        return await self._find_one(Modifier, {"_id": modifier_id})
+
+    async def get_modifiers(
+        self, skip: int = 0, limit: int = 0, fields: List[str] = None
+    ) -> List[Modifier]:
+        return await self._find(Modifier, {}, skip, limit, fields=fields)
+
+    async def has_modifier(self, modifier_id: str) -> bool:
+        return await self._count(Modifier, {"_id": modifier_id}) > 0
+
+    # --- Crossword helper methods ---
+
+    async def get_crossword(self, crossword_date: str) -> Crossword:
+        return await self._find_one(Crossword, {"date": crossword_date})
+
+    async def add_crossword(self, crossword: Crossword) -> str:
+        return await self._insert(crossword)
+
+    async def has_crossword(self, crossword_date: str) -> bool:
+        return await self._count(Crossword, {"date": crossword_date}) > 0
+
+    # --- Roulette helper methods ---
+
+    async def get_roulettes_by_player(
+        self, player_id: int, skip: int = 0, limit: int = 0
+    ) -> List[Roulette]:
+        query = {f"players.{player_id}": {"$exists": True}}
+        return await self._find(Roulette, query, skip, limit)
+
+    async def add_roulette(self, roulette: Roulette) -> str:
+        return await self._insert(roulette)
+
+    # --- HorseRace helper methods ---
+
+    async def get_horse_races_by_player(
+        self, player_id: int, skip: int = 0, limit: int = 0
+    ) -> List[HorseRace]:
+        return await self._find(HorseRace, {"player": player_id}, skip, limit)
+
+    async def add_horse_race(self, horse_race: HorseRace) -> str:
+        return await self._insert(horse_race)
+
+    # --- Stock helper methods ---
+
+    async def get_stock(self, ticker: str) -> Stock:
+        return await self._find_one(Stock, {"ticker": ticker})
+
+    async def get_stocks(self, skip: int = 0, limit: int = 0) -> List[Stock]:
+        return await self._find(Stock, {}, skip, limit)
+
+    async def has_stock(self, ticker: str) -> bool:
+        return await self._count(Stock, {"ticker": ticker}) > 0
+
+    # --- StockPrice helper methods ---
+
+    async def get_current_stock_price(self, ticker: str) -> Optional[StockPrice]:
+        bucket = await self._collection(StockPriceBucket).find_one(
+            {"ticker": ticker},
+            {"ticker": 1, "last_timestamp": 1, "close": 1},
+            sort=[("day", -1)],
+        )
+        return DB._get_bucket_close(bucket) if bucket else None
+
+    async def get_stock_price_at(
+        self, ticker: str, timestamp: datetime.datetime
+    ) -> Optional[StockPrice]:
+        query = {
+            "ticker": ticker,
+            "day": {"$lte": timestamp},
+            "first_timestamp": {"$lte": timestamp},
+        }
+        bucket = await self._collection(StockPriceBucket).find_one(
+            query, PRICE_AT_PROJECTION, sort=[("day", -1)]
+        )
+        return DB._get_bucket_price_at(bucket, timestamp) if bucket else None
+
+    async def get_stock_price_in_date_range(
+        self, ticker: str, start_date: datetime.datetime, end_date: datetime.datetime
+    ) -> List[StockPrice]:
+        query = {
+            "ticker": ticker,
+            "day": {"$gte": DB.get_bucket_day(start_date), "$lte": end_date},
+        }
+        return await self._find_bucket_prices(query, start_date, end_date)
+
+    async def get_stock_price_history(self, ticker: str) -> List[StockPrice]:
+        return await self._find_bucket_prices({"ticker": ticker})
+
+    async def has_stock_price(self, ticker: str) -> bool:
+        return await self._count(StockPriceBucket, {"ticker": ticker}) > 0
+
+    async def _find_bucket_prices(
+        self,
+        query: dict,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+    ) -> List[StockPrice]:
+        cursor = self._collection(StockPriceBucket).find(
+            query, BUCKET_PROJECTION, sort=[("day", 1)]
+        )
+        stock_prices = []
+        async for bucket in cursor:
+            stock_prices.extend(DB._unpack_bucket(bucket, start_date, end_date))
+        return stock_prices
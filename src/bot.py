@@ -6,6 +6,7 @@ from discord.ext import commands
 from dotenv import load_dotenv
 
 from db import DB
+from async_db import AsyncDB
 from cogs.crossword_cog import CrosswordCog
 from cogs.admin_cog import AdminCog
 from cogs.gamble_cog import GambleCog
@@ -29,9 +30,9 @@ from log import set_up_logger
 
 
 class WaPoBot(commands.Bot):
-    def __init__(self, db: DB, command_prefix, intents):
+    def __init__(self, db: DB, async_db: AsyncDB, command_prefix, intents):
         super().__init__(command_prefix=command_prefix, intents=intents)
-        self.player_service = PlayerService(db)
+        self.player_service = PlayerService(db, async_db)
         self.crossword_service = CrosswordService(db)
         self.roulette_service = RouletteService(db)
         self.horse_race_service = HorseRaceService(db)
@@ -96,7 +97,7 @@ async def main():
     intents.reactions = True
 
     db = DB("wapo")
-    bot = WaPoBot(db, command_prefix="!", intents=intents)
+    bot = WaPoBot(db, AsyncDB(db), command_prefix="!", intents=intents)
     bot.help_command = WaPoHelp()
     await bot.add_cog(CrosswordCog(bot))
     await bot.add_cog(GambleCog(bot))
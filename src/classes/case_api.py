@@ -2,11 +2,14 @@ import json
 import random
 from typing import Dict, Any
 
+from rng import get_random
+
 
 class CaseAPI:
     """"""
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, rng: random.Random = None):
+        self.rng = rng or get_random("case")
         case_data = self._load_case_data(file_path)
         self._items = case_data["items"]
         self._odds_base = case_data["odds_base"]
@@ -28,8 +31,8 @@ class CaseAPI:
         total_odds = sum(odd[1] for odd in odds_list)
         normalized_odds = [odd[1] / total_odds for odd in odds_list]
 
-        chosen_tier = random.choices([tier[0] for tier in odds_list], weights=normalized_odds, k=1)[0]
-        chosen_item = random.choice(self._items[chosen_tier])
+        chosen_tier = self.rng.choices([tier[0] for tier in odds_list], weights=normalized_odds, k=1)[0]
+        chosen_item = self.rng.choice(self._items[chosen_tier])
 
         return chosen_tier, chosen_item
 
@@ -0,0 +1,80 @@
+import json
+import logging
+from types import MappingProxyType
+from typing import List, Optional, Tuple, Type
+
+import helper
+from db import DB
+from schemas.product import Product
+
+
+class Catalog:
+    """
+    Read-only, in-memory lookup of products (items or modifiers)
+
+    The catalog is loaded once and only changes through refresh and remove,
+    so lookups never touch the database
+    """
+
+    def __init__(self, products: List[Product]):
+        self.refresh(products)
+
+    def refresh(self, products: List[Product]) -> None:
+        """
+        Replaces the catalog contents, e.g. after the products in the
+        database have changed
+        """
+        self._products = tuple(products)
+        self._by_id = MappingProxyType({p.id: p for p in self._products})
+        self._by_name = MappingProxyType({p.name: p for p in self._products})
+        self._purchasable = tuple(p for p in self._products if p.is_purchasable)
+        self._names = tuple(self._by_name)
+
+    def remove(self, product_id: str) -> None:
+        self.refresh([p for p in self._products if p.id != product_id])
+
+    def get(self, product_id: str) -> Optional[Product]:
+        return self._by_id.get(product_id)
+
+    def get_by_name(self, name: str) -> Optional[Product]:
+        return self._by_name.get(name)
+
+    def get_all(self) -> Tuple[Product, ...]:
+        return self._products
+
+    def get_purchasable(self) -> Tuple[Product, ...]:
+        return self._purchasable
+
+    def get_names(self) -> Tuple[str, ...]:
+        return self._names
+
+    def has(self, product_id: str) -> bool:
+        return product_id in self._by_id
+
+
+def load_catalog(db: DB, product_cls: Type[Product], path: str) -> Catalog:
+    """
+    Reads the products file, syncs the database with it and builds a catalog
+    of the products. The database is left untouched if the file has not
+    changed since the last sync
+    """
+    try:
+        with open(path, "r") as file:
+            raw_data = json.load(file)
+    except FileNotFoundError:
+        raise ValueError(f"The file '{path}' was not found.")
+    except json.JSONDecodeError:
+        raise ValueError(f"Could not decode the contents of '{path}'")
+
+    products = [product_cls(**product_dict) for product_dict in raw_data]
+    for product in products:
+        product.validate()
+
+    content_hash = helper.get_content_hash(raw_data)
+
+    if db.get_catalog_hash(product_cls) != content_hash:
+        counts = db.sync_products(product_cls, products, content_hash)
+        collection = product_cls._meta["collection"]
+        logging.info("Synced %s from %s: %s", collection, path, counts)
+
+    return Catalog(products)
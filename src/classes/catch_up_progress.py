@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class CatchUpProgress:
+    """
+    Progress of simulating the stock prices missed since the last tick, e.g.
+    after the bot has been down
+    """
+
+    def __init__(self):
+        self.start_date: Optional[datetime] = None
+        self.end_date: Optional[datetime] = None
+        self.simulated_until: Optional[datetime] = None
+        self.nr_chunks = 0
+        self.nr_prices = 0
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def start(self, start_date: datetime, end_date: datetime) -> None:
+        self.__init__()
+        self.start_date = start_date
+        self.end_date = end_date
+        self.simulated_until = start_date
+        self.started_at = datetime.now()
+
+    def advance(self, simulated_until: datetime, nr_prices: int) -> None:
+        self.simulated_until = simulated_until
+        self.nr_chunks += 1
+        self.nr_prices += nr_prices
+
+    def finish(self) -> None:
+        self.finished_at = datetime.now()
+
+    def is_running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    def get_percent_done(self) -> float:
+        if self.start_date is None or self.end_date <= self.start_date:
+            return 100.0
+
+        done = self.simulated_until - self.start_date
+        return done / (self.end_date - self.start_date) * 100
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "running": self.is_running(),
+            "percent_done": self.get_percent_done(),
+            "chunks": self.nr_chunks,
+            "prices": self.nr_prices,
+        }
@@ -0,0 +1,43 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+class ChartCache:
+    """
+    Rendered charts by key, evicting the least recently used chart once
+    max_size charts are cached
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._charts: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        chart = self._charts.get(key)
+
+        if chart is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._charts.move_to_end(key)
+        return chart
+
+    def put(self, key: Hashable, chart: bytes) -> None:
+        self._charts[key] = chart
+        self._charts.move_to_end(key)
+
+        while len(self._charts) > self.max_size:
+            self._charts.popitem(last=False)
+
+    def invalidate(self, ticker: str) -> None:
+        """
+        Drops the charts of a ticker, keys start with the ticker
+        """
+        for key in [key for key in self._charts if key[0] == ticker]:
+            del self._charts[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"size": len(self._charts), "hits": self.hits, "misses": self.misses}
@@ -2,6 +2,8 @@ import random
 from enum import Enum
 from typing import List
 
+from rng import get_random
+
 
 class DuelState(Enum):
     PENDING = 1
@@ -73,7 +75,14 @@ class Duel:
         DuelMove("Heal", "💖", MoveType.HEAL, 20, 7),
     ]
 
-    def __init__(self, challenger: Duelist, challengee: Duelist, wager: int):
+    def __init__(
+        self,
+        challenger: Duelist,
+        challengee: Duelist,
+        wager: int,
+        rng: random.Random = None,
+    ):
+        self.rng = rng or get_random("duel")
         self.challenger = challenger
         self.challengee = challengee
         self.wager = wager
@@ -93,7 +102,7 @@ class Duel:
         self.state = DuelState.COMPLETED
 
     def do_round(self) -> str:
-        attacker = random.choice([self.challenger, self.challengee])
+        attacker = self.rng.choice([self.challenger, self.challengee])
         defender = self.challengee if attacker == self.challenger else self.challenger
 
         move = self.get_random_move(self.moves)
@@ -158,5 +167,5 @@ class Duel:
 
     def get_random_move(self, moves: List[DuelMove]):
         weights = [move.weight for move in moves]
-        selected_move = random.choices(moves, weights, k=1)[0]
+        selected_move = self.rng.choices(moves, weights, k=1)[0]
         return selected_move
@@ -2,11 +2,20 @@ import random
 import math
 
 from const import GAMBLE_EMOJIS
+from rng import get_random
 
 
 class HorseRace:
-    def __init__(self, row: int, avatar: str, length=20, headstart=False):
+    def __init__(
+        self,
+        row: int,
+        avatar: str,
+        length=20,
+        headstart=False,
+        rng: random.Random = None,
+    ):
         self.row = row
+        self.rng = rng or get_random("horse_race")
         self.values = [0, 0, 0, 0]
         if headstart:
             self.values[row] = 1
@@ -19,7 +28,7 @@ class HorseRace:
     def simulate_race(self):
         below_threshold = set(range(len(self.values)))
         while below_threshold:
-            index = random.choice(list(below_threshold))
+            index = self.rng.choice(list(below_threshold))
             self.values[index] += 1
 
             if self.values[index] >= self.length:
@@ -0,0 +1,28 @@
+from typing import Optional
+
+from schemas.stock import Stock
+
+
+class StockSnapshot:
+    """
+    Current price of a stock and how it changed over the last day and week
+    """
+
+    def __init__(
+        self,
+        stock: Stock,
+        price: int,
+        price_24_hrs: Optional[int] = None,
+        price_1_week: Optional[int] = None,
+    ):
+        self.stock = stock
+        self.price = price
+        self.change_24_hrs = get_percent_change(price, price_24_hrs)
+        self.change_1_week = get_percent_change(price, price_1_week)
+
+
+def get_percent_change(price: int, previous_price: Optional[int]) -> float:
+    if not previous_price:
+        return 0
+
+    return ((price - previous_price) / previous_price) * 100
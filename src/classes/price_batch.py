@@ -0,0 +1,57 @@
+from typing import Dict, List, Tuple
+import numpy as np
+
+from schemas.stock_price import StockPrice
+
+
+class PriceBatch:
+    """
+    Prices of many tickers as tickers by hours matrices. Row i holds the
+    first counts[i] prices of tickers[i], the rest of the row is padding
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        timestamps: np.ndarray,
+        prices: np.ndarray,
+        counts: np.ndarray,
+    ):
+        self.tickers = tickers
+        self.timestamps = timestamps
+        self.prices = prices
+        self.counts = counts
+
+    def __len__(self) -> int:
+        return int(self.counts.sum())
+
+    def get_timestamps(self, i: int) -> np.ndarray:
+        return self.timestamps[i, : self.counts[i]]
+
+    def get_prices(self, i: int) -> np.ndarray:
+        return self.prices[i, : self.counts[i]]
+
+    def to_arrays(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Timestamp and price arrays per ticker, as taken by
+        DB.add_stock_price_arrays
+        """
+        return {
+            ticker: (self.get_timestamps(i), self.get_prices(i))
+            for i, ticker in enumerate(self.tickers)
+            if self.counts[i]
+        }
+
+    def get_last_prices(self) -> List[StockPrice]:
+        """
+        Latest price of every ticker with at least one price in the batch
+        """
+        return [
+            StockPrice(
+                ticker=ticker,
+                timestamp=self.get_timestamps(i)[-1].item(),
+                price=self.get_prices(i)[-1].item(),
+            )
+            for i, ticker in enumerate(self.tickers)
+            if self.counts[i]
+        ]
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from schemas.stock_price import StockPrice
+
+
+class LatestPriceCache:
+    """
+    Latest known price per ticker. Loaded from the database on startup and
+    written through by the stock tick, so reads never hit the database
+    """
+
+    def __init__(self):
+        self._prices: Dict[str, StockPrice] = {}
+        self.loaded_at: Optional[datetime] = None
+        self.updated_at: Optional[datetime] = None
+
+    def load(self, stock_prices: Iterable[StockPrice]) -> None:
+        self._prices = {}
+        for stock_price in stock_prices:
+            self.update(stock_price)
+        self.loaded_at = datetime.now()
+
+    def update(self, stock_price: StockPrice) -> None:
+        current = self._prices.get(stock_price.ticker)
+
+        # Never replace a price with an older one
+        if current is None or stock_price.timestamp >= current.timestamp:
+            self._prices[stock_price.ticker] = stock_price
+            self.updated_at = datetime.now()
+
+    def get(self, ticker: str) -> Optional[StockPrice]:
+        return self._prices.get(ticker)
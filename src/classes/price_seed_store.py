@@ -0,0 +1,45 @@
+import os
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+
+
+class PriceSeedStore:
+    """
+    Historical daily prices per real ticker, stored as compressed .npz files
+    so stocks can be initialised without downloading them
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def get(self, ticker: str) -> Optional[pd.DataFrame]:
+        """
+        Gets the stored prices as a frame with a Price column indexed by date
+        """
+        if not self.has(ticker):
+            return None
+
+        with np.load(self._get_file(ticker)) as seed:
+            dates = seed["dates"].astype("datetime64[ns]")
+            prices = seed["prices"]
+
+        index = pd.DatetimeIndex(dates, name="Date")
+        return pd.DataFrame({"Price": prices}, index=index)
+
+    def save(self, ticker: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        np.savez_compressed(
+            self._get_file(ticker),
+            dates=df.index.to_numpy(dtype="datetime64[D]"),
+            prices=df["Price"].to_numpy(dtype=np.float64),
+        )
+
+    def has(self, ticker: str) -> bool:
+        return os.path.isfile(self._get_file(ticker))
+
+    def get_missing(self, tickers: List[str]) -> List[str]:
+        return [ticker for ticker in tickers if not self.has(ticker)]
+
+    def _get_file(self, ticker: str) -> str:
+        return os.path.join(self.path, f"{ticker}.npz")
@@ -0,0 +1,73 @@
+import math
+import numpy as np
+
+
+def get_log_returns(prices: np.ndarray, previous_price: float = None) -> np.ndarray:
+    """
+    Hourly log returns of the prices. Zero or negative prices count as 1
+
+    Without a previous price the first return is 0, like a filled NaN from
+    pct_change
+    """
+    prices = clamp_prices(prices)
+
+    if previous_price is None:
+        previous_prices = np.concatenate((prices[:1], prices[:-1]))
+    else:
+        previous_prices = np.concatenate((clamp_prices([previous_price]), prices[:-1]))
+
+    return np.log(prices / previous_prices)
+
+
+def clamp_prices(prices: np.ndarray) -> np.ndarray:
+    """
+    Replaces zero or negative prices with 1
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    return np.where(prices <= 0, 1, prices)
+
+
+class RunningMoments:
+    """
+    Count, mean and sum of squared deviations (M2) of a growing series,
+    updated batch by batch without revisiting earlier values
+    """
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, values: np.ndarray) -> "RunningMoments":
+        """
+        Merges the moments of a batch of values, Welford's update generalised
+        to batches (Chan et al.)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        batch_count = len(values)
+
+        if batch_count == 0:
+            return self
+
+        batch_mean = values.mean()
+        batch_m2 = np.square(values - batch_mean).sum()
+
+        count = self.count + batch_count
+        delta = batch_mean - self.mean
+
+        self.mean += delta * batch_count / count
+        self.m2 += batch_m2 + delta**2 * self.count * batch_count / count
+        self.count = count
+        return self
+
+    def get_mean(self) -> float:
+        return self.mean
+
+    def get_std(self) -> float:
+        """
+        Sample standard deviation, 0 until there are two values
+        """
+        if self.count < 2:
+            return 0.0
+
+        return math.sqrt(self.m2 / (self.count - 1))
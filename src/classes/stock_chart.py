@@ -0,0 +1,254 @@
+import io
+import os
+import math
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont
+
+CHART_BACKENDS = ("matplotlib", "pillow")
+CHART_FORMATS = {"png": "png", "png-palette": "png", "webp": "webp"}  # Extensions
+PALETTE_COLORS = 64
+WEBP_QUALITY = 80
+
+# Pillow chart layout, in pixels, the size of a 10x6 inch matplotlib figure
+WIDTH, HEIGHT = 1000, 600
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 90, 30, 60, 70
+NR_TICKS = 6
+LINE_COLOR = (0, 128, 128)
+GRID_COLOR = (200, 200, 200)
+TEXT_COLOR = (0, 0, 0)
+
+
+def get_chart_backend() -> str:
+    """
+    Chart backend from the CHART_BACKEND environment variable
+    """
+    backend = (os.getenv("CHART_BACKEND") or "matplotlib").lower()
+
+    if backend not in CHART_BACKENDS:
+        raise ValueError(
+            f"Unknown chart backend {backend}, use one of {', '.join(CHART_BACKENDS)}"
+        )
+
+    return backend
+
+
+def get_chart_format() -> str:
+    """
+    Chart image format from the CHART_FORMAT environment variable
+    """
+    chart_format = (os.getenv("CHART_FORMAT") or "png").lower()
+
+    if chart_format not in CHART_FORMATS:
+        formats = ", ".join(CHART_FORMATS)
+        raise ValueError(f"Unknown chart format {chart_format}, use one of {formats}")
+
+    return chart_format
+
+
+def get_chart_extension() -> str:
+    return CHART_FORMATS[get_chart_format()]
+
+
+def get_chart_width() -> Optional[int]:
+    """
+    Chart width in pixels from the CHART_WIDTH environment variable, None
+    keeps the width the backend drew
+    """
+    width = os.getenv("CHART_WIDTH")
+    return int(width) if width else None
+
+
+def render_stock_chart(title: str, df: pd.DataFrame) -> bytes:
+    """
+    Renders the Price column of the frame as a line chart with the configured
+    backend, encoded in the configured format
+
+    Top-level and free of bot state, so it can run in a worker process
+    """
+    chart, _ = render_stock_chart_with_stats(title, df)
+    return chart
+
+
+def render_stock_chart_with_stats(title: str, df: pd.DataFrame) -> Tuple[bytes, float]:
+    """
+    Like render_stock_chart, also returning the encode time in seconds
+    """
+    chart_format, width = get_chart_format(), get_chart_width()
+
+    if get_chart_backend() == "pillow":
+        image = draw_pillow_chart(title, df)
+    elif chart_format == "png" and not width:
+        # The PNG matplotlib saved is already the chart, with no encoding left
+        return save_matplotlib_chart(title, df), 0.0
+    else:
+        image = draw_matplotlib_chart(title, df)
+
+    start = time.perf_counter()
+    chart = encode_chart(image, chart_format, width)
+    return chart, time.perf_counter() - start
+
+
+def encode_chart(
+    image: Image.Image, chart_format: str, width: Optional[int] = None
+) -> bytes:
+    """
+    Scales the chart to width pixels, if given, and encodes it as a full
+    colour PNG, a palette quantised PNG or a lossy WebP
+    """
+    if width and width != image.width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+
+    if chart_format == "png-palette":
+        image = image.quantize(colors=PALETTE_COLORS)
+        image.save(buffer, format="png", optimize=True)
+    elif chart_format == "webp":
+        image.save(buffer, format="webp", quality=WEBP_QUALITY)
+    else:
+        image.save(buffer, format="png")
+
+    return buffer.getvalue()
+
+
+def draw_matplotlib_chart(title: str, df: pd.DataFrame) -> Image.Image:
+    return Image.open(io.BytesIO(save_matplotlib_chart(title, df))).convert("RGB")
+
+
+def save_matplotlib_chart(title: str, df: pd.DataFrame) -> bytes:
+    """
+    Draws the chart with matplotlib and returns it as a PNG
+    """
+    # Imported here so the Pillow backend never loads matplotlib
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    df["Price"].plot(ax=ax, color="teal", linewidth=2)
+
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel("Date", fontsize=14)
+    ax.set_ylabel("Price", fontsize=14)
+
+    ax.grid(True, linestyle="--", alpha=0.7)
+
+    ax.tick_params(axis="x", labelsize=12, labelrotation=45)
+    ax.tick_params(axis="y", labelsize=12)
+
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png", bbox_inches="tight")
+
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def draw_pillow_chart(title: str, df: pd.DataFrame) -> Image.Image:
+    """
+    Draws the same line chart as draw_matplotlib_chart with Pillow: the
+    price line, a dashed grid, tick labels, axis labels and a title
+    """
+    seconds = df.index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    prices = df["Price"].to_numpy(dtype=np.float64)
+
+    image = Image.new("RGB", (WIDTH, HEIGHT), "white")
+    draw = ImageDraw.Draw(image)
+    title_font, label_font, tick_font = _get_font(22), _get_font(18), _get_font(14)
+
+    left, top = MARGIN_LEFT, MARGIN_TOP
+    right, bottom = WIDTH - MARGIN_RIGHT, HEIGHT - MARGIN_BOTTOM
+
+    x_min, x_max = float(seconds[0]), float(seconds[-1])
+    if x_max == x_min:
+        x_max = x_min + 1
+
+    y_ticks = _get_ticks(prices.min(), prices.max())
+    y_min, y_max = y_ticks[0], y_ticks[-1]
+
+    def to_x(values):
+        return left + (values - x_min) / (x_max - x_min) * (right - left)
+
+    def to_y(values):
+        return bottom - (values - y_min) / (y_max - y_min) * (bottom - top)
+
+    for tick in y_ticks:
+        y = to_y(tick)
+        _draw_dashed_line(draw, (left, y), (right, y))
+        draw.text((left - 8, y), f"{tick:g}", TEXT_COLOR, tick_font, anchor="rm")
+
+    date_format = "%Y-%m-%d" if x_max - x_min > 2 * 86400 else "%m-%d %H:%M"
+    for tick in np.linspace(x_min, x_max, NR_TICKS):
+        x = to_x(tick)
+        _draw_dashed_line(draw, (x, top), (x, bottom))
+        date = np.datetime64(int(tick), "s").astype(datetime)
+        label = date.strftime(date_format)
+        draw.text((x, bottom + 8), label, TEXT_COLOR, tick_font, anchor="ma")
+
+    draw.rectangle((left, top, right, bottom), outline=TEXT_COLOR)
+
+    points = list(zip(to_x(seconds.astype(np.float64)), to_y(prices)))
+    draw.line(points, fill=LINE_COLOR, width=2, joint="curve")
+
+    draw.text((WIDTH / 2, top / 2), title, TEXT_COLOR, title_font, anchor="mm")
+    x_label_center = ((left + right) / 2, HEIGHT - 20)
+    draw.text(x_label_center, "Date", TEXT_COLOR, label_font, anchor="mm")
+    _draw_vertical_text(image, (20, (top + bottom) / 2), "Price", label_font)
+
+    return image
+
+
+def _get_font(size: int) -> ImageFont.FreeTypeFont:
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def _get_ticks(low: float, high: float) -> List[float]:
+    """
+    About NR_TICKS round tick values (steps of 1, 2 or 5 times a power of
+    ten) covering low to high
+    """
+    if high == low:
+        low, high = low - 1, high + 1
+
+    raw_step = (high - low) / (NR_TICKS - 1)
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw_step)
+
+    start = math.floor(low / step) * step
+    end = math.ceil(high / step) * step
+    return [start + i * step for i in range(round((end - start) / step) + 1)]
+
+
+def _draw_dashed_line(
+    draw: ImageDraw.ImageDraw,
+    start: Tuple[float, float],
+    end: Tuple[float, float],
+    dash: int = 4,
+) -> None:
+    (x0, y0), (x1, y1) = start, end
+    length = math.hypot(x1 - x0, y1 - y0)
+
+    for offset in np.arange(0, length, 2 * dash):
+        a = offset / length
+        b = min(offset + dash, length) / length
+        segment = [(x0 + (x1 - x0) * a, y0 + (y1 - y0) * a)]
+        segment.append((x0 + (x1 - x0) * b, y0 + (y1 - y0) * b))
+        draw.line(segment, fill=GRID_COLOR)
+
+
+def _draw_vertical_text(
+    image: Image.Image, center: Tuple[float, float], text: str, font
+) -> None:
+    _, _, width, height = font.getbbox(text)
+    label = Image.new("RGBA", (width, height), (255, 255, 255, 0))
+    ImageDraw.Draw(label).text((0, 0), text, TEXT_COLOR, font)
+    label = label.rotate(90, expand=True)
+
+    x, y = center
+    image.paste(label, (int(x - label.width / 2), int(y - label.height / 2)), label)
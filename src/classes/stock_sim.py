@@ -1,18 +1,22 @@
-import io
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import yfinance as yf
 
-from schemas.stock import Stock
 from schemas.stock_price import StockPrice
+from classes.return_stats import RunningMoments, clamp_prices, get_log_returns
+from classes.price_batch import PriceBatch
+from classes.price_seed_store import PriceSeedStore
+from rng import get_generator
 
 
 class StockSim:
-    def __init__(self):
-        pass
+    def __init__(
+        self, seed_store: PriceSeedStore = None, rng: np.random.Generator = None
+    ):
+        self.seed_store = seed_store
+        self.rng = rng or get_generator("stock_sim")
 
     def simulate_initial_stock_prices(
         self, ticker: str, days_back: int = 30
@@ -23,34 +27,149 @@ class StockSim:
         historical_prices = self.fetch_historical_prices(ticker)
         return self.monte_carlo_simulation(historical_prices, start_date, end_date)
 
-    def simulate_next_stock_price(self, stock_prices: pd.DataFrame) -> pd.DataFrame:
-        start_date = stock_prices.index[-1]
-        end_date = datetime.now()
-        return self.monte_carlo_simulation(stock_prices, start_date, end_date)
+    def simulate_next_stock_prices(
+        self,
+        last_prices: List[StockPrice],
+        moments: List[RunningMoments],
+        end_date: datetime = None,
+        correlation: Optional[np.ndarray] = None,
+    ) -> PriceBatch:
+        """
+        Simulates the hours since the last price of every ticker in one
+        tickers by hours operation, from the running return moments
+
+        The optional correlation matrix correlates the hourly returns of the
+        tickers, in the order of last_prices
+        """
+        end_date = end_date or datetime.now()
+        hour = np.timedelta64(1, "h")
+
+        start_dates = np.array(
+            [stock_price.timestamp for stock_price in last_prices],
+            dtype="datetime64[us]",
+        )
+        counts = (np.datetime64(end_date, "us") - start_dates) // hour
+        counts = np.maximum(counts, 0).astype(np.int64)
+        nr_hours = int(counts.max(initial=0))
+
+        timestamps = start_dates[:, None] + hour * np.arange(1, nr_hours + 1)
+
+        mu = np.array([m.get_mean() for m in moments])[:, None]
+        sigma = np.array([m.get_std() for m in moments])[:, None]
+        shocks = self.rng.standard_normal((len(last_prices), nr_hours))
+
+        if correlation is not None:
+            try:
+                shocks = np.linalg.cholesky(correlation) @ shocks
+            except np.linalg.LinAlgError:
+                raise ValueError("Correlation matrix is not positive definite")
+
+        # Simulate future hourly returns and calculate simulated prices
+        sim_rets = mu + sigma * shocks
+        initial_prices = clamp_prices([sp.price for sp in last_prices])[:, None]
+        sim_prices = initial_prices * (sim_rets + 1).cumprod(axis=1)
+
+        tickers = [stock_price.ticker for stock_price in last_prices]
+        return PriceBatch(tickers, timestamps, sim_prices, counts)
+
+    def get_market_correlation(self, nr_tickers: int, rho: float) -> np.ndarray:
+        """
+        Correlation matrix with the same correlation rho between every pair
+        of tickers, like a shared market factor
+        """
+        correlation = np.full((nr_tickers, nr_tickers), rho)
+        np.fill_diagonal(correlation, 1.0)
+        return correlation
+
+    def stock_prices_to_dataframe(
+        self, stock_prices: Iterable[StockPrice], count: int = None
+    ) -> pd.DataFrame:
+        """
+        Builds a price frame indexed by timestamp. When count is given the
+        prices are streamed into preallocated buffers, so an iterator over a
+        long history is never collected into a list
+        """
+        if count is None:
+            stock_prices = list(stock_prices)
+            count = len(stock_prices)
+
+        prices = np.empty(count, dtype=np.float64)
+        timestamps = np.empty(count, dtype="datetime64[us]")
+        filled = 0
+
+        for stock_price in stock_prices:
+            # Rows added after counting are left for the next read
+            if filled == count:
+                break
+
+            prices[filled] = stock_price.price
+            timestamps[filled] = stock_price.timestamp
+            filled += 1
+
+        return pd.DataFrame(
+            {"Price": prices[:filled]}, index=pd.DatetimeIndex(timestamps[:filled])
+        )
 
-    def stock_prices_to_dataframe(self, stock_prices: List[StockPrice]) -> pd.DataFrame:
-        prices = [sp.price for sp in stock_prices]
-        timestamps = [sp.timestamp for sp in stock_prices]
+    def dataframe_to_arrays(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Timestamp and price columns of a price frame, without building a
+        document per row
+        """
+        timestamps = df.index.to_numpy(dtype="datetime64[us]")
+        prices = df["Price"].to_numpy(dtype=np.float64)
+        return timestamps, prices
 
-        return pd.DataFrame(prices, index=pd.to_datetime(timestamps), columns=["Price"])
+    def fetch_historical_prices(self, ticker: str, days_back=90) -> pd.DataFrame:
+        """
+        Reads the prices from the seed store. Tickers missing from the store
+        are downloaded and added to it
+        """
+        if self.seed_store:
+            df = self.seed_store.get(ticker)
+            if df is not None:
+                return df
 
-    def dataframe_to_stock_prices(self, ticker, df) -> List[StockPrice]:
-        stock_prices = []
-        for timestamp, row in df.iterrows():
-            stock_price = StockPrice(
-                ticker=ticker, timestamp=timestamp, price=row["Price"]
-            )
-            stock_prices.append(stock_price)
+        df = self.download_historical_prices(ticker, days_back)
 
-        return stock_prices
+        if self.seed_store:
+            self.seed_store.save(ticker, df)
 
-    def fetch_historical_prices(self, ticker: str, days_back=90) -> pd.DataFrame:
+        return df
+
+    def download_historical_prices(self, ticker: str, days_back=90) -> pd.DataFrame:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
 
         df = yf.download(ticker, start=start_date, end=end_date)
+        return self._get_price_frame(df)
+
+    def download_many_historical_prices(
+        self, tickers: List[str], days_back=90
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Downloads the prices of all tickers in one call, as yfinance is not
+        thread-safe. Tickers without adjusted closes are left out
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+
+        df = yf.download(
+            tickers, start=start_date, end=end_date, threads=True, group_by="ticker"
+        )
 
-        if "Adj Close" not in df.columns:
+        historical_prices = {}
+        for ticker in tickers:
+            try:
+                # A single ticker is not grouped
+                grouped = isinstance(df.columns, pd.MultiIndex)
+                ticker_df = (df[ticker] if grouped else df).dropna()
+                historical_prices[ticker] = self._get_price_frame(ticker_df)
+            except (KeyError, ValueError):
+                continue
+        return historical_prices
+
+    def _get_price_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        if "Adj Close" not in df.columns or df.empty:
             raise ValueError("Adjusted Close prices not available for this ticker.")
 
         if not isinstance(df.index, pd.DatetimeIndex):
@@ -60,7 +179,23 @@ class StockSim:
         df = df[["Adj Close"]].rename(columns={"Adj Close": "Price"})
         return df
 
+    def get_return_moments(self, historical_data: pd.DataFrame) -> RunningMoments:
+        return RunningMoments().update(
+            get_log_returns(historical_data["Price"].to_numpy())
+        )
+
     def monte_carlo_simulation(self, historical_data, start_date, end_date):
+        moments = self.get_return_moments(historical_data)
+        initial_price = clamp_prices([historical_data["Price"].iloc[-1]])[0]
+        return self.simulate_prices(initial_price, moments, start_date, end_date)
+
+    def simulate_prices(
+        self,
+        initial_price: float,
+        moments: RunningMoments,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> pd.DataFrame:
         if isinstance(start_date, str):
             start_date = datetime.fromisoformat(start_date)
         if isinstance(end_date, str):
@@ -74,49 +209,14 @@ class StockSim:
         date_range_start = start_date + pd.Timedelta(hours=1)
         date_range = pd.date_range(start=date_range_start, end=end_date, freq="H")
 
-        # Replace zero or negative values with 1
-        historical_data["Price"] = historical_data["Price"].apply(
-            lambda x: 1 if x <= 0 else x
-        )
-
-        log_returns = np.log(1 + historical_data["Price"].pct_change())
-
-        # Handling NaN values that may have been introduced
-        log_returns = log_returns.fillna(0)
-
-        mu = log_returns.mean()
-        sigma = log_returns.std()
-
         # Simulate future hourly returns
-        sim_rets = np.random.normal(mu, sigma, len(date_range))
+        mu = moments.get_mean()
+        sigma = moments.get_std()
+        sim_rets = self.rng.normal(mu, sigma, len(date_range))
 
         # Calculate simulated prices
-        initial_price = historical_data["Price"].iloc[-1]
         sim_prices = initial_price * (sim_rets + 1).cumprod()
 
         sim_prices_df = pd.DataFrame(sim_prices, index=date_range, columns=["Price"])
 
         return sim_prices_df
-
-    def plot_stock_prices(self, stock: Stock, stock_prices: List[StockPrice]):
-        df = self.stock_prices_to_dataframe(stock_prices)
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        df["Price"].plot(ax=ax, color="teal", linewidth=2)
-
-        ax.set_title(f"{stock.company} - ${stock.ticker}", fontsize=16)
-        ax.set_xlabel("Date", fontsize=14)
-        ax.set_ylabel("Price", fontsize=14)
-
-        ax.grid(True, linestyle="--", alpha=0.7)
-
-        ax.tick_params(axis="x", labelsize=12, labelrotation=45)
-        ax.tick_params(axis="y", labelsize=12)
-
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format="png", bbox_inches="tight")
-        buffer.seek(0)
-
-        plt.close(fig)
-        return buffer
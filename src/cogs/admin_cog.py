@@ -27,3 +27,19 @@ class AdminCog(commands.Cog):
     async def dev_ping_error(self, ctx: Context, error):
         if isinstance(error, BadArgument):
             await ctx.send(content=f"`dev-ping` error: {error}", ephemeral=True)
+
+    @commands.hybrid_command(
+        name="dev-catch-up", description="Progress of the stock price catch-up"
+    )
+    async def dev_catch_up(self, ctx: commands.Context):
+        if not self.is_dev_mode():
+            raise BadArgument(self._NOT_DEV_MODE_MSG)
+
+        stats = self.bot.stock_service.catch_up_progress.get_stats()
+        lines = [f"{name}: {value}" for name, value in stats.items()]
+        await ctx.send(content="\n".join(lines), ephemeral=True)
+
+    @dev_catch_up.error
+    async def dev_catch_up_error(self, ctx: Context, error):
+        if isinstance(error, BadArgument):
+            await ctx.send(content=f"`dev-catch-up` error: {error}", ephemeral=True)
@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord.ext import commands
 
@@ -74,7 +75,8 @@ class CrosswordCog(commands.Cog):
 
         crossword_date = helper.get_puzzle_date(crossword_link)
 
-        if self.bot.crossword_service.has_crossword(crossword_date):
+        crossword_service = self.bot.crossword_service
+        if await asyncio.to_thread(crossword_service.has_crossword, crossword_date):
             embed_warning = helper.get_embed(
                 "Crossword Checker",
                 "Crossword is already solved",
@@ -95,17 +97,20 @@ class CrosswordCog(commands.Cog):
         puzzle_weekday = helper.get_puzzle_weekday(crossword_date)
         puzzle_reward = helper.get_puzzle_reward(puzzle_weekday, puzzle_time)
 
-        self.bot.crossword_service.add_crossword(crossword_date, puzzle_time)
+        await asyncio.to_thread(
+            crossword_service.add_crossword, crossword_date, puzzle_time
+        )
 
-        players = self.bot.player_service.get_players()
         crossword_boost_modifier = self.bot.modifier_service.get_modifier("crossword_booster")
 
-        for player in players:
-            # Increase the reward for players with a Crossword Booster
-            if player.is_modifier_valid(crossword_boost_modifier):
-                player.add_coins(round(puzzle_reward * 1.5))
-            else:
-                player.add_coins(puzzle_reward)
+        # Increase the reward for players with a Crossword Booster, and start
+        # the happy hour event for everyone in the same pass
+        nr_players = await self.bot.player_service.reward_all_players(
+            puzzle_reward,
+            round(puzzle_reward * 1.5),
+            crossword_boost_modifier,
+            "happy_hour",
+        )
 
         embed_success = helper.get_embed(
             "Crossword Checker",
@@ -113,16 +118,12 @@ class CrosswordCog(commands.Cog):
                 "Crossword complete!"
                 f" Completed in {helper.format_seconds(puzzle_time)},"
                 f" {puzzle_reward} coin(s)"
-                f" rewarded to {len(players)} players."
+                f" rewarded to {nr_players} players."
             ),
             discord.Color.green(),
         )
 
         await message.edit(embed=embed_success)
 
-        # Start happy hour event if the crossword is complete
-        for player in players:
-            player.add_modifier("happy_hour")
-
         embed_happy_hour = helper.get_embed("🍻 Happy Hour 🍻", "Happy hour is starting now!", discord.Color.green())
         message = await reaction.message.channel.send(embed=embed_happy_hour)
@@ -40,8 +40,8 @@ class DuelCog(commands.Cog):
                     "You have an active challenge with this user"
                 )
 
-        p1 = self.bot.player_service.get_player(ctx.author.id)
-        p2 = self.bot.player_service.get_player(user.id)
+        p1 = await self.bot.player_service.get_player(ctx.author.id)
+        p2 = await self.bot.player_service.get_player(user.id)
 
         if p2.get_coins() < amount:
             raise commands.BadArgument(
@@ -67,8 +67,6 @@ class DuelCog(commands.Cog):
 
         # Duel never got accepted
         if duel.state == DuelState.PENDING:
-            # Prevent race condition on player object
-            p1 = self.bot.player_service.get_player(ctx.author.id)
             p1.add_coins(amount)
 
             self.duels.remove(duel)
@@ -84,7 +82,7 @@ class DuelCog(commands.Cog):
         if user and ctx.author.id == user.id:
             raise commands.BadArgument("Can't accept a duel from yourself")
 
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
         pending_duels = []
 
@@ -114,7 +112,7 @@ class DuelCog(commands.Cog):
     async def handle_accept_duel(
         self, player: Player, ctx: commands.Context, duel: Duel
     ):
-        player.remove_coins(duel.wager)
+        await asyncio.to_thread(player.remove_coins, duel.wager)
         duel.accept()
         await self.simulate_duel(ctx, duel)
 
@@ -135,9 +133,7 @@ class DuelCog(commands.Cog):
 
         winner = duel.get_winner()
 
-        # Prevent race condition
-        player = self.bot.player_service.get_player(winner.id)
-        player.add_coins(duel.wager * 2)
+        await self.bot.player_service.settle_coins({winner.id: duel.wager * 2})
 
         embed.description = f"{winner.name} won {duel.wager} coin(s)!"
         await ctx.send(embed=embed)
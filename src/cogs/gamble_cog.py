@@ -1,4 +1,3 @@
-import random
 import asyncio
 from datetime import datetime
 import discord
@@ -7,6 +6,7 @@ from discord.ext import commands
 from classes.horse_race import HorseRace
 from schemas.player import Player
 import helper
+from rng import get_random
 
 
 class GambleCog(commands.Cog):
@@ -16,6 +16,7 @@ class GambleCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.rng = get_random("gamble")
 
     @commands.hybrid_command(
         name="gamble",
@@ -30,7 +31,7 @@ class GambleCog(commands.Cog):
             raise commands.BadArgument("Must wager at least 1 coin")
 
         # Gather player information
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         player_name = ctx.author.name
         player_avatar = player.active_avatar
 
@@ -44,7 +45,7 @@ class GambleCog(commands.Cog):
         if player.get_coins() < bet_cost:
             raise commands.BadArgument("You do not have enough coins")
 
-        player.remove_coins(bet_cost)
+        await asyncio.to_thread(player.remove_coins, bet_cost)
 
         horse_steroids_modifier = self.bot.modifier_service.get_modifier("horse_steroids")
         has_horse_steroids = player.is_modifier_valid(horse_steroids_modifier)
@@ -77,11 +78,14 @@ class GambleCog(commands.Cog):
         if player.is_modifier_valid(happy_hour_modifier):
             nr_coins_won = round(nr_coins_won * 1.05)
 
-        # Fetch player info again to avoid race condition
-        player = self.bot.player_service.get_player(ctx.author.id)
-
         # Save race information
-        self.bot.horse_race_service.add_horse_race(datetime.today, player.id, amount, nr_coins_won)
+        await asyncio.to_thread(
+            self.bot.horse_race_service.add_horse_race,
+            datetime.today,
+            player.id,
+            amount,
+            nr_coins_won,
+        )
 
         placing_suffixes = {
             1: "st",
@@ -93,7 +97,7 @@ class GambleCog(commands.Cog):
         placing_str = f"{placing}{placing_suffixes[placing]}"
         result_str = f"{player_name} got {placing_str} place and won {nr_coins_won} coin(s)!"
 
-        player.add_coins(nr_coins_won)
+        await asyncio.to_thread(player.add_coins, nr_coins_won)
 
         result_embed = helper.get_embed(
             "Horse Race Results",
@@ -103,7 +107,7 @@ class GambleCog(commands.Cog):
         await ctx.send(embed=result_embed)
 
         # If player bets at least 10 coins, give 10% chance to drop a reward
-        if amount >= 10 and random.random() < 0.1:
+        if amount >= 10 and self.rng.random() < 0.1:
             await self.handle_drop_reward(ctx, player)
 
     @gamble.error
@@ -112,7 +116,7 @@ class GambleCog(commands.Cog):
             await ctx.send(content=f"`gamble` error: {error}")
 
     async def handle_drop_reward(self, ctx: commands.Context, player: Player):
-        chosen_reward = random.choice(["avatar_case", "wand_of_wealth"])
+        chosen_reward = self.rng.choice(["avatar_case", "wand_of_wealth"])
         item = self.bot.item_service.get_item(chosen_reward)
-        player.add_item(item.id)
+        await asyncio.to_thread(player.add_item, item.id)
         await ctx.send(content=f"🍀 {ctx.author.mention} got a {item.name} {item.symbol} in a drop! 🍀")
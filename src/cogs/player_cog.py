@@ -1,4 +1,5 @@
 import os
+import asyncio
 import random
 from typing import List
 import discord
@@ -7,6 +8,7 @@ from discord.ext import commands
 from schemas.item import Item
 from schemas.player import Player
 from schemas.player_avatar import PlayerAvatar
+from db import InsufficientCoinsError, PlayerNotFoundError
 import helper
 
 
@@ -22,18 +24,18 @@ class PlayerCog(commands.Cog):
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def profile(self, ctx: commands.Context):
         player_id = ctx.author.id
-        player = self.bot.player_service.get_player(player_id)
+        player = await self.bot.player_service.get_player(player_id)
 
         # Compile player information
         name = ctx.author.name
         avatar = player.get_active_avatar() or "No avatar"
         inventory = player.get_items()
         coins = player.get_coins()
-        horse_race_stats = self.bot.horse_race_service.get_horse_race_stats_by_player(
-            player_id
+        horse_race_stats = await asyncio.to_thread(
+            self.bot.horse_race_service.get_horse_race_stats_by_player, player_id
         )
-        roulette_stats = self.bot.roulette_service.get_roulette_stats_by_player(
-            player_id
+        roulette_stats = await asyncio.to_thread(
+            self.bot.roulette_service.get_roulette_stats_by_player, player_id
         )
 
         embed = helper.get_embed(
@@ -69,7 +71,7 @@ class PlayerCog(commands.Cog):
     @commands.hybrid_command(name="coins", description="Check your coin balance")
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def coins(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         coins = player.get_coins()
         await ctx.send(content=f"You have {coins} coins", ephemeral=True)
 
@@ -81,7 +83,7 @@ class PlayerCog(commands.Cog):
     @commands.hybrid_command(name="holdings", description="Check your holdings")
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def holdings(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
         embed = helper.get_embed(
             "Player Holdings", "The stocks you own", discord.Color.purple()
@@ -118,7 +120,7 @@ class PlayerCog(commands.Cog):
     )
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def inventory(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         items = player.get_items()
 
         embed = helper.get_embed(f"{ctx.author.name}'s Inventory", "", discord.Color.orange())
@@ -147,7 +149,7 @@ class PlayerCog(commands.Cog):
 
     @commands.hybrid_command(name="modifiers", description="See all your modifiers")
     async def modifiers(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         modifiers = player.get_modifiers()
 
         embed = helper.get_embed(f"{ctx.author.name} Modifiers", "", discord.Color.blue())
@@ -187,7 +189,7 @@ class PlayerCog(commands.Cog):
     @commands.hybrid_command(name="use", description="Use an item")
     @commands.cooldown(1, 1, commands.BucketType.user)
     async def use(self, ctx: commands.Context, item_name: str, optional_user: discord.User = None):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         item = self.bot.item_service.get_item_by_name(item_name)
 
         if not player.has_item(item.id):
@@ -211,11 +213,16 @@ class PlayerCog(commands.Cog):
         if amount < 1:
             raise commands.BadArgument("Must give at least 1 coin")
 
-        sender = self.bot.player_service.get_player(ctx.author.id)
-        receiver = self.bot.player_service.get_player(user.id)
-
-        sender.remove_coins(amount)
-        receiver.add_coins(amount)
+        try:
+            await self.bot.player_service.settle_coins(
+                {ctx.author.id: -amount, user.id: amount}
+            )
+        except InsufficientCoinsError:
+            raise commands.BadArgument("Not enough coins")
+        except PlayerNotFoundError as e:
+            if e.player_id != user.id:
+                raise commands.BadArgument("Not enough coins")
+            raise commands.BadArgument(f"{user.name} has not played yet")
 
         await ctx.send(content=f"Gave {user.name} {amount} coin(s)")
 
@@ -227,7 +234,7 @@ class PlayerCog(commands.Cog):
     @commands.hybrid_command(name="flex", description="Show off your wealth, baby!")
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def flex(self, ctx):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         player_balance = player.get_coins()
         message = ""
 
@@ -272,12 +279,12 @@ class PlayerCog(commands.Cog):
 
     @commands.hybrid_command(name="avatar", description="Change your current avatar")
     async def avatar(self, ctx: commands.Context, avatar: str):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
         if not player.has_avatar(avatar):
             raise commands.BadArgument("You do not have this avatar")
 
-        player.set_active_avatar(avatar)
+        await asyncio.to_thread(player.set_active_avatar, avatar)
         await ctx.send(content="Updated avatar", ephemeral=True)
 
     @avatar.error
@@ -287,7 +294,7 @@ class PlayerCog(commands.Cog):
 
     @commands.hybrid_command(name="avatars", description="See all your avatars")
     async def avatars(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         avatars = player.get_avatars()
 
         embed = helper.get_embed(f"{ctx.author.name} Avatars", "", discord.Color.blue())
@@ -325,7 +332,7 @@ class PlayerCog(commands.Cog):
             raise commands.BadArgument(f"Failed to use {item.name}")
 
         if item.one_time_use:
-            player.remove_item(item.id)
+            await asyncio.to_thread(player.remove_item, item.id)
 
     async def open_case(self, ctx: commands.Context, player: Player):
         four_leaf_clover_modifier = self.bot.modifier_service.get_modifier("four_leaf_clover")
@@ -333,7 +340,7 @@ class PlayerCog(commands.Cog):
 
         rarity, icon = self.bot.case_api.get_random_case_item(has_clover)
 
-        player.add_avatar(icon, rarity)
+        await asyncio.to_thread(player.add_avatar, icon, rarity)
 
         rarity_colors = {
             "Common": 0xFFFFFF,
@@ -350,29 +357,29 @@ class PlayerCog(commands.Cog):
         await ctx.send(embed=embed)
 
     async def show_players_coins(self, ctx: commands.Context):
-        players = self.bot.player_service.get_players()
+        coin_balances = await self.bot.player_service.get_coin_balances()
 
         embed = helper.get_embed("Player coins", "Here are all player coins", discord.Color.orange())
 
-        for player in players:
-            user_info = await self.bot.fetch_user(player.id)
-            embed.add_field(name=user_info.name, value=player.get_coins(), inline=False)
+        for player_id, coins in coin_balances.items():
+            user_info = await self.bot.fetch_user(player_id)
+            embed.add_field(name=user_info.name, value=coins, inline=False)
 
         await ctx.send(embed=embed, ephemeral=True)
 
     async def apply_skunk_spray(self, ctx: commands.Context, user: discord.User):
-        target_player = self.bot.player_service.get_player(user.id)
-        target_player.add_modifier("stinky")
+        target_player = await self.bot.player_service.get_player(user.id)
+        await asyncio.to_thread(target_player.add_modifier, "stinky")
         await ctx.send(content=f"{user.name} is now stinky!")
 
     async def use_wand_of_wealth(self, ctx: commands.Context, player: Player):
         if random.random() < 0.5:
             modifier = self.bot.modifier_service.get_modifier("crossword_booster")
-            player.add_modifier("crossword_booster")
+            await asyncio.to_thread(player.add_modifier, "crossword_booster")
             await ctx.send(content=f"Applied {modifier.name} {modifier.symbol}.")
         else:
             nr_coins = random.randint(30, 200)
-            player.add_coins(nr_coins)
+            await asyncio.to_thread(player.add_coins, nr_coins)
             await ctx.send(content=f"You got {nr_coins} coins!")
 
     async def send_special_video(self, ctx: commands.Context, player: Player):
@@ -1,3 +1,4 @@
+import asyncio
 from discord.ext import commands
 
 from const import DAILY_REWARD, WEEKLY_REWARD
@@ -10,8 +11,8 @@ class RewardCog(commands.Cog):
     @commands.hybrid_command(name="daily", description="Get your daily coins")
     @commands.cooldown(1, 86400, commands.BucketType.user)
     async def daily(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
-        player.add_coins(DAILY_REWARD)
+        player = await self.bot.player_service.get_player(ctx.author.id)
+        await asyncio.to_thread(player.add_coins, DAILY_REWARD)
         await ctx.send(content=f"Received {DAILY_REWARD} coins", ephemeral=True)
 
     @daily.error
@@ -22,8 +23,8 @@ class RewardCog(commands.Cog):
     @commands.hybrid_command(name="weekly", description="Get your weekly coins")
     @commands.cooldown(1, 86400 * 7, commands.BucketType.user)
     async def weekly(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
-        player.add_coins(WEEKLY_REWARD)
+        player = await self.bot.player_service.get_player(ctx.author.id)
+        await asyncio.to_thread(player.add_coins, WEEKLY_REWARD)
         await ctx.send(content=f"Received {WEEKLY_REWARD} coins", ephemeral=True)
 
     @weekly.error
@@ -1,4 +1,3 @@
-import random
 import asyncio
 from datetime import datetime
 from typing import Any, Dict
@@ -8,6 +7,7 @@ from tabulate import tabulate
 
 import helper
 from const import ROULETTE_ICON
+from rng import get_random
 
 
 class RouletteEvent:
@@ -24,10 +24,11 @@ class RouletteCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.roulette_event = RouletteEvent()
+        self.rng = get_random("roulette")
 
     @commands.hybrid_command(name="roulette", description="Welcome to Vegas!")
     async def roulette(self, ctx: commands.Context, amount: int):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
         if amount < 1:
             raise commands.BadArgument("Must wager at least 1 coin")
@@ -35,7 +36,7 @@ class RouletteCog(commands.Cog):
         if player.get_coins() < amount:
             raise commands.BadArgument("Not enough coins")
 
-        player.remove_coins(amount)
+        await asyncio.to_thread(player.remove_coins, amount)
 
         if player.id in self.roulette_event.participants:
             self.roulette_event.participants[player.id]["coins"] += amount
@@ -98,9 +99,11 @@ class RouletteCog(commands.Cog):
         participants = self.roulette_event.participants
 
         if len(participants) < 2:
-            for player_id, participant in participants.items():
-                player = self.bot.player_service.get_player(player_id)
-                player.add_coins(participant["coins"])
+            refunds = {
+                player_id: participant["coins"]
+                for player_id, participant in participants.items()
+            }
+            await self.bot.player_service.settle_coins(refunds)
 
             await ctx.send(
                 content="Not enough participants for roulette to start. Refunding coins."
@@ -110,11 +113,10 @@ class RouletteCog(commands.Cog):
         users = [user_info["user"] for user_info in participants.values()]
         user_coins = [user_info["coins"] for user_info in participants.values()]
 
-        winner = random.choices(users, weights=user_coins, k=1)[0]
-        winner_player = self.bot.player_service.get_player(winner.id)
+        winner = self.rng.choices(users, weights=user_coins, k=1)[0]
         win_amount = sum(user_coins)
 
-        winner_player.add_coins(win_amount)
+        await self.bot.player_service.settle_coins({winner.id: win_amount})
 
         odds_table = get_odds_table(participants)
         embed = helper.get_embed(
@@ -138,7 +140,12 @@ class RouletteCog(commands.Cog):
         player_dict = {
             str(player_id): data["coins"] for player_id, data in participants.items()
         }
-        self.bot.roulette_service.add_roulette(datetime.today(), player_dict, winner.id)
+        await asyncio.to_thread(
+            self.bot.roulette_service.add_roulette,
+            datetime.today(),
+            player_dict,
+            winner.id,
+        )
 
 
 async def handle_roulette_countdown(seconds: int, ctx: commands.Context):
@@ -3,12 +3,14 @@ import random
 from typing import Dict, List
 import asyncio
 import discord
-import numpy as np
 from discord.ext import commands
 from discord.ext.commands import BadArgument, Context, CommandError
 
 from classes.challenge import ChallengeManager, Challenge
+from db import InsufficientCoinsError
 from const import EMOJI_MONEY_WITH_WINGS
+from schemas.player import Player
+from rng import get_random
 import helper
 
 
@@ -17,6 +19,7 @@ class StealCog(commands.Cog):
         self.bot = bot
         self.words = self._load_words("data/words.json")
         self.challenge_manager = ChallengeManager()
+        self.rng = get_random("steal")
 
     def _load_words(self, file_path: str) -> Dict[str, List[str]]:
         try:
@@ -30,8 +33,8 @@ class StealCog(commands.Cog):
     @commands.hybrid_command(name="steal", description="Steal coins from a user")
     @commands.cooldown(1, 28800, commands.BucketType.user)
     async def steal(self, ctx: commands.Context, user: discord.User):
-        player = self.bot.player_service.get_player(ctx.author.id)
-        target_player = self.bot.player_service.get_player(user.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
+        target_player = await self.bot.player_service.get_player(user.id)
 
         if player.id == target_player.id:
             raise commands.BadArgument("You cannot steal from yourself")
@@ -48,7 +51,7 @@ class StealCog(commands.Cog):
 
             await self.handle_steal_fail(
                 ctx,
-                player.id,
+                player,
                 f"The other player had a {lock.name} {lock.symbol} [{time_left}] that prevented you from stealing",
             )
             return
@@ -58,9 +61,9 @@ class StealCog(commands.Cog):
         if player.has_modifier("ninja_lesson"):
             nr_ninja_modifiers = player.get_modifier("ninja_lesson").stacks
 
-        if not check_steal_success(nr_ninja_modifiers):
+        if not check_steal_success(nr_ninja_modifiers, self.rng):
             await self.handle_steal_fail(
-                ctx, player.id, "You did not succeed in stealing"
+                ctx, player, "You did not succeed in stealing"
             )
             return
 
@@ -68,7 +71,7 @@ class StealCog(commands.Cog):
         has_signal_jammer = player.is_modifier_valid(signal_jammer_modifier)
 
         prepared_words = prepare_words(self.words, has_signal_jammer)
-        message = generate_message(**prepared_words)
+        message = generate_message(**prepared_words, rng=self.rng)
 
         # Prevent copy-pasting
         modified_message = insert_zero_width_spaces(message)
@@ -92,14 +95,19 @@ class StealCog(commands.Cog):
         await asyncio.sleep(time_to_steal)
 
         if not challenge.is_complete:
-            # Get player objects again to prevent race condition
-            player = self.bot.player_service.get_player(ctx.author.id)
-            target_player = self.bot.player_service.get_player(user.id)
-
-            coins_stolen = get_norm(target_player.get_coins(), 30, 25)
-            player.add_coins(coins_stolen)
-            target_player.remove_coins(coins_stolen)
-            await ctx.send(content=f"{ctx.author.name} stole {coins_stolen} coins from {user.name}!")
+            # The balance may have changed while the challenge was running
+            await asyncio.to_thread(target_player.reload, "coins")
+            coins_stolen = get_norm(target_player.get_coins(), 30, 25, self.rng)
+
+            try:
+                # The debit is still guarded, in case the balance drops now
+                await self.bot.player_service.settle_coins(
+                    {player.id: coins_stolen, target_player.id: -coins_stolen}
+                )
+            except InsufficientCoinsError:
+                await ctx.send(content=f"{user.name} spent their coins before you could steal them!")
+            else:
+                await ctx.send(content=f"{ctx.author.name} stole {coins_stolen} coins from {user.name}!")
 
         self.challenge_manager.remove_challenge(challenge)
 
@@ -123,7 +131,7 @@ class StealCog(commands.Cog):
                 )
 
     async def handle_steal_fail(
-        self, ctx: Context, player_id: int, message: str
+        self, ctx: Context, player: Player, message: str
     ) -> None:
         """
         Handles the case when a player fails to steal from another player.
@@ -131,14 +139,19 @@ class StealCog(commands.Cog):
 
         Parameters:
         - ctx (discord.Context): Message context.
-        - player_id (int): ID of the player that attempted to steal.
+        - player (Player): The player that attempted to steal.
         - message (str): Message to send.
         """
-        # Get player again to prevent any race conditions
-        player = self.bot.player_service.get_player(player_id)
+        # Draw the loss from the stored balance, the loaded one may be stale
+        await asyncio.to_thread(player.reload, "coins")
+        coins_lost = get_norm(player.get_coins(), 20, 15, self.rng)
+
+        try:
+            await asyncio.to_thread(player.remove_coins, coins_lost)
+        except ValueError:
+            await ctx.send(content=f"{message}. You had no coins left to lose.")
+            return
 
-        coins_lost = get_norm(player.get_coins(), 20, 15)
-        player.remove_coins(coins_lost)
         await ctx.send(content=f"{message}. You lost {coins_lost} coins.")
 
 
@@ -170,6 +183,7 @@ def generate_message(
     adjectives: List[str],
     prepositional_phrases: List[str],
     direct_objects: List[str],
+    rng: random.Random = random,
 ) -> str:
     """
     Generates a random message based on categories of words.
@@ -181,18 +195,19 @@ def generate_message(
     - adjectives (List[str]): List of adjectives.
     - prepositional_phrases (List[str]): List of prepositional phrases.
     - direct_objects (List[str]): List of direct objects.
+    - rng (random.Random, optional): Random number generator to draw from.
 
     Returns:
     - str: Generated message.
     """
-    noun = random.choice(nouns)
-    verb = random.choice(verbs)
+    noun = rng.choice(nouns)
+    verb = rng.choice(verbs)
     optional_modifiers = (
         adverbs
         + prepositional_phrases
         + [f"{adj} {do}" for adj, do in zip(adjectives, direct_objects)]
     )
-    modifier = random.choice([None] + optional_modifiers)
+    modifier = rng.choice([None] + optional_modifiers)
 
     if modifier in adjectives:
         message = f"{modifier} {noun} {verb}"
@@ -218,13 +233,14 @@ def insert_zero_width_spaces(message: str) -> str:
     return nbsp.join(message)
 
 
-def check_steal_success(nr_modifiers: int = 0) -> bool:
+def check_steal_success(nr_modifiers: int = 0, rng: random.Random = random) -> bool:
     """
     Flips a coin and returns True or False.
     Takes an optional argument nr_modifiers to increase the chance of success.
 
     Parameters:
     - nr_modifiers (int, optional): Number of modifiers to increase the odds.
+    - rng (random.Random, optional): Random number generator to draw from.
 
     Returns:
     - bool: Whether the coin flip succeeded or not.
@@ -238,10 +254,12 @@ def check_steal_success(nr_modifiers: int = 0) -> bool:
     max_probability = 0.95
     adjusted_probability = min(max(probability, min_probability), max_probability)
 
-    return random.random() < adjusted_probability
+    return rng.random() < adjusted_probability
 
 
-def get_norm(value: int, mean: int = 50, std: int = 15) -> int:
+def get_norm(
+    value: int, mean: int = 50, std: int = 15, rng: random.Random = random
+) -> int:
     """
     Samples a random integer value between 0 and the input based on a Gaussian distribution.
 
@@ -249,11 +267,12 @@ def get_norm(value: int, mean: int = 50, std: int = 15) -> int:
     - value (int): The max value to draw from.
     - mean (int, optional): The mean of the Gaussian distribution.
     - std (int, optional): The standard deviation of the Gaussian distribution.
+    - rng (random.Random, optional): Random number generator to draw from.
 
     Returns:
     - int: A random value from the Gaussian distribution.
     """
-    norm = np.random.normal(mean, std)
+    norm = rng.gauss(mean, std)
     norm_clamped = max(min(norm, 100), 0)
     output_value = value * (norm_clamped / 100)
     return round(output_value)
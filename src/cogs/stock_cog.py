@@ -1,8 +1,10 @@
+import io
+import asyncio
 import logging
-from datetime import datetime, timedelta
 import discord
 from discord.ext import commands, tasks
 
+from classes.stock_chart import get_chart_extension
 import helper
 
 
@@ -14,6 +16,12 @@ class StockCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.update_stock_price.start()
+        self.compact_stock_prices.start()
+
+    async def cog_unload(self):
+        self.update_stock_price.cancel()
+        self.compact_stock_prices.cancel()
+        self.bot.stock_service.close()
 
     @commands.hybrid_group(name="stock", description="Group of stock commands")
     @commands.cooldown(1, 10, commands.BucketType.user)
@@ -28,40 +36,22 @@ class StockCog(commands.Cog):
 
     @stock.command(name="list")
     async def stock_list(self, ctx):
-        stocks = self.bot.stock_service.get_all_stocks()
+        snapshots = await asyncio.to_thread(self.bot.stock_service.get_market_snapshot)
 
         embed = helper.get_embed(
             "Stock List", "Here are the available stocks:", discord.Color.orange()
         )
 
-        date_24_hrs = datetime.now() - timedelta(days=1)
-        date_1_week = datetime.now() - timedelta(days=7)
-
-        for stock in stocks:
-            curr_price = self.bot.stock_service.get_current_stock_price(stock.ticker)
-            price_24_hrs = self.bot.stock_service.get_stock_price_by_date(
-                stock.ticker, date_24_hrs
-            )
-            price_1_week = self.bot.stock_service.get_stock_price_by_date(
-                stock.ticker, date_1_week
-            )
-
-            change_24_hrs = (
-                ((curr_price - price_24_hrs) / price_24_hrs) * 100
-                if price_24_hrs
-                else 0
-            )
-            change_1_week = (
-                ((curr_price - price_1_week) / price_1_week) * 100
-                if price_1_week
-                else 0
-            )
+        for snapshot in snapshots:
+            stock = snapshot.stock
+            change_24_hrs = snapshot.change_24_hrs
+            change_1_week = snapshot.change_1_week
 
             emoji_24_hrs = "\U0001F4C8" if change_24_hrs >= 0 else "\U0001F4C9"
             emoji_1_week = "\U0001F4C8" if change_1_week >= 0 else "\U0001F4C9"
 
             field_value = (
-                f"Current: {curr_price} "
+                f"Current: {snapshot.price} "
                 f"- 24h: {change_24_hrs:.2f}% {emoji_24_hrs} "
                 f"- Week: {change_1_week:.2f}% {emoji_1_week}"
             )
@@ -80,7 +70,7 @@ class StockCog(commands.Cog):
 
     @stock.command(name="price")
     async def stock_price(self, ctx, ticker: str):
-        if not self.bot.stock_service.has_stock(ticker):
+        if not await asyncio.to_thread(self.bot.stock_service.has_stock, ticker):
             raise commands.BadArgument(f"Stock with ticker {ticker} does not exist")
         price = self.bot.stock_service.get_current_stock_price(ticker)
         await ctx.send(f"{ticker}: {price} coin(s)")
@@ -92,30 +82,24 @@ class StockCog(commands.Cog):
 
     @stock.command(name="history")
     async def stock_history(self, ctx, ticker: str, date_range: str = None):
-        stock = self.bot.stock_service.get_stock(ticker)
-        stock_prices = []
+        stock = await asyncio.to_thread(self.bot.stock_service.get_stock, ticker)
+        days = None
         date_ranges = {"day": 1, "week": 7, "month": 30}
 
         if date_range:
             if date_range in date_ranges:
                 days = date_ranges[date_range]
-                start_date = datetime.now() - timedelta(days=days)
-                end_date = datetime.now()
-                stock_prices = self.bot.stock_service.get_stock_price_in_date_range(
-                    stock.ticker, start_date, end_date
-                )
             else:
                 raise commands.BadArgument(
                     f"Available date ranges: {', '.join(date_ranges)}"
                 )
-        else:
-            stock_prices = self.bot.stock_service.get_stock_prices(stock.ticker)
 
-        stock_plot = self.bot.stock_service.get_stock_price_plot(stock, stock_prices)
-        file = discord.File(fp=stock_plot, filename="stock_plot.png")
+        stock_plot = await self.bot.stock_service.get_stock_price_chart(stock, days)
+        filename = f"stock_plot.{get_chart_extension()}"
+        file = discord.File(fp=io.BytesIO(stock_plot), filename=filename)
 
         embed = helper.get_embed(f"${stock.ticker}", "", discord.Color.green())
-        embed.set_image(url="attachment://stock_plot.png")
+        embed.set_image(url=f"attachment://{filename}")
 
         await ctx.send(embed=embed, file=file)
 
@@ -126,9 +110,9 @@ class StockCog(commands.Cog):
 
     @stock.command(name="buy")
     async def stock_buy(self, ctx: commands.Context, ticker: str, quantity: int):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
-        if not self.bot.stock_service.has_stock(ticker):
+        if not await asyncio.to_thread(self.bot.stock_service.has_stock, ticker):
             raise commands.BadArgument(f"Stock with ticker {ticker} does not exist")
 
         stock_price = self.bot.stock_service.get_current_stock_price(ticker)
@@ -143,8 +127,8 @@ class StockCog(commands.Cog):
         if player.get_coins() < total_cost:
             raise commands.BadArgument(f"Not enough coins to buy {quantity}x ${ticker}")
 
-        player.add_holding(ticker, quantity, stock_price)
-        player.remove_coins(total_cost)
+        await asyncio.to_thread(player.remove_coins, total_cost)
+        await asyncio.to_thread(player.add_holding, ticker, quantity, stock_price)
 
         await ctx.send(f"Bought {quantity} shares of {ticker} for {total_cost} coins")
 
@@ -155,9 +139,9 @@ class StockCog(commands.Cog):
 
     @stock.command(name="sell")
     async def stock_sell(self, ctx: commands.Context, ticker: str, quantity: int):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
-        if not self.bot.stock_service.has_stock(ticker):
+        if not await asyncio.to_thread(self.bot.stock_service.has_stock, ticker):
             raise commands.BadArgument(f"Stock with ticker {ticker} does not exist")
 
         stock_price = self.bot.stock_service.get_current_stock_price(ticker)
@@ -175,8 +159,8 @@ class StockCog(commands.Cog):
         if player.get_holding(ticker).shares < quantity:
             raise commands.BadArgument("Not enough shares")
 
-        player.remove_holding(ticker, quantity)
-        player.add_coins(total_cost)
+        await asyncio.to_thread(player.remove_holding, ticker, quantity)
+        await asyncio.to_thread(player.add_coins, total_cost)
 
         await ctx.send(f"Sold {quantity} shares of {ticker} for {total_cost} coins")
 
@@ -187,12 +171,23 @@ class StockCog(commands.Cog):
 
     @tasks.loop(hours=1)
     async def update_stock_price(self):
-        stocks = self.bot.stock_service.get_all_stocks()
+        stocks = await asyncio.to_thread(self.bot.stock_service.get_all_stocks)
+        chunks = self.bot.stock_service.catch_up_stock_prices(stocks)
 
-        for stock in stocks:
-            logging.debug("Updating %s stock prices...", stock.ticker)
-            self.bot.stock_service.simulate_next_stock_prices(stock)
+        # Long gaps are simulated in chunks, each in a worker thread
+        while await asyncio.to_thread(next, chunks, None) is not None:
+            pass
 
     @update_stock_price.before_loop
     async def before_update_stock_price(self):
         await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=24)
+    async def compact_stock_prices(self):
+        stock_service = self.bot.stock_service
+        nr_compacted = await asyncio.to_thread(stock_service.compact_stock_prices)
+        logging.info("Compacted %s days of stock prices", nr_compacted)
+
+    @compact_stock_prices.before_loop
+    async def before_compact_stock_prices(self):
+        await self.bot.wait_until_ready()
@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord.ext import commands
 
@@ -69,7 +70,7 @@ class StoreCog(commands.Cog):
     @commands.hybrid_command(name="", description="")
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def cases(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
         four_leaf_clover_modifier = self.bot.modifier_service.get_modifier("four_leaf_clover")
         has_clover = player.is_modifier_valid(four_leaf_clover_modifier)
         tiers = self.bot.case_api.get_tiers(has_clover)
@@ -105,7 +106,7 @@ class StoreCog(commands.Cog):
         modifier_names = [m.name for m in modifiers]
         product_name = helper.closest_match(item_name, item_names + modifier_names)
 
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
         if product_name in item_names:
             # Product is an item
@@ -116,8 +117,8 @@ class StoreCog(commands.Cog):
                     f"Not enough coins to buy {quantity}x {item.name}"
                 )
 
-            player.add_item(item.id, quantity)
-            player.remove_coins(item.price * quantity)
+            await asyncio.to_thread(player.remove_coins, item.price * quantity)
+            await asyncio.to_thread(player.add_item, item.id, quantity)
             await ctx.send(content=f"Bought {quantity} {item.name}(s)", ephemeral=True)
         else:
             # Product is a modifier
@@ -138,8 +139,8 @@ class StoreCog(commands.Cog):
             if player.get_coins() < modifier.price * quantity:
                 raise commands.BadArgument(f"Not enough coins to buy {quantity}x {modifier.name}")
 
-            player.add_modifier(modifier.id, quantity)
-            player.remove_coins(modifier.price * quantity)
+            await asyncio.to_thread(player.remove_coins, modifier.price * quantity)
+            await asyncio.to_thread(player.add_modifier, modifier.id, quantity)
             await ctx.send(content=f"Bought {quantity} {modifier.name}(s)", ephemeral=True)
 
     @buy.error
@@ -26,12 +26,12 @@ class TriviaCog(commands.Cog):
     )
     @commands.cooldown(1, 60, commands.BucketType.user)
     async def trivia(self, ctx: commands.Context):
-        player = self.bot.player_service.get_player(ctx.author.id)
+        player = await self.bot.player_service.get_player(ctx.author.id)
 
         if player.get_coins() < 5:
             raise commands.BadArgument("Not enough coins")
 
-        player.remove_coins(5)
+        await asyncio.to_thread(player.remove_coins, 5)
 
         trivia = get_trivia()
         question = trivia["question"]
@@ -71,8 +71,6 @@ class TriviaCog(commands.Cog):
             if interaction.user.id != ctx.author.id:
                 return
 
-            player = self.bot.player_service.get_player(ctx.author.id)
-
             selected_answer = interaction.data["custom_id"]
 
             if selected_answer == correct_answer:
@@ -83,7 +81,7 @@ class TriviaCog(commands.Cog):
 
                 nr_coins = difficulty_coins_map.get(difficulty, 0)
                 response = f"Correct! You get {nr_coins} coins"
-                player.add_coins(nr_coins)
+                await self.bot.player_service.add_coins(ctx.author.id, nr_coins)
 
             else:
                 for button in view.children:
@@ -145,12 +143,12 @@ class TriviaCog(commands.Cog):
     async def on_message(self, message: discord.Message):
         if message.channel.id in self.movie_channel_dict:
             movie = self.movie_channel_dict[message.channel.id]
-            player = self.bot.player_service.get_player(message.author.id)
+            player = await self.bot.player_service.get_player(message.author.id)
             similarity_score = self.get_similarity_score(message.content, movie.name)
 
             if similarity_score >= 85:
                 del self.movie_channel_dict[message.channel.id]
-                player.add_coins(10)
+                await asyncio.to_thread(player.add_coins, 10)
                 embed = helper.get_embed(
                     f"Correct! The movie was {movie.name}",
                     f"Release Date: {movie.date}",
@@ -10,6 +10,15 @@ EMOJI_MONEY_WITH_WINGS = "\U0001F4B8"
 DAILY_REWARD = 10
 WEEKLY_REWARD = 50
 
+# Stocks
+HOURLY_PRICE_RETENTION_DAYS = 90  # Older prices are compacted to daily OHLC
+HOURLY_HISTORY_MAX_DAYS = 31  # Longer history charts plot daily closes
+STOCK_MARKET_CORRELATION = 0.0  # Correlation of hourly returns between stocks
+CATCH_UP_CHUNK_HOURS = 24  # Hours simulated per step when catching up
+CHART_CACHE_SIZE = 64  # Rendered !stock history charts kept in memory
+CHART_WORKERS = 1  # Processes rendering charts
+CHART_MAX_POINTS = 1000  # About one price per pixel of chart width
+
 # Crosswords
 DAY_SCORE_TABLE = {
     "Monday": 6,
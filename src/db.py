@@ -1,9 +1,20 @@
 import os
+import bisect
 import datetime
 import logging
 from urllib.parse import quote_plus
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+import numpy as np
 from mongoengine import connect
+from pymongo import (
+    DeleteMany,
+    InsertOne,
+    ReplaceOne,
+    ReturnDocument,
+    UpdateMany,
+    UpdateOne,
+)
+from pymongo.errors import DuplicateKeyError, OperationFailure
 
 from schemas.player import Player
 from schemas.crossword import Crossword
@@ -11,8 +22,45 @@ from schemas.roulette import Roulette
 from schemas.horse_race import HorseRace
 from schemas.stock import Stock
 from schemas.stock_price import StockPrice
+from schemas.stock_price_bucket import StockPriceBucket
 from schemas.item import Item
 from schemas.modifier import Modifier
+from schemas.product import Product
+from schemas.catalog_state import CatalogState
+from schemas.coin_transfer import CoinTransfer
+
+# Documents that declare indexes for their hot queries
+INDEXED_DOCUMENTS = [Crossword, HorseRace, Stock, StockPriceBucket]
+
+# Number of documents fetched per round trip by the iter_* getters
+DEFAULT_BATCH_SIZE = 1000
+
+# StockPriceBucket fields read for individual prices and for daily closes
+BUCKET_FIELDS = ("ticker", "timestamps", "prices", "last_timestamp", "close")
+DAILY_BUCKET_FIELDS = ("ticker", "last_timestamp", "close")
+# A compacted bucket answers price lookups with its open or close
+PRICE_AT_FIELDS = BUCKET_FIELDS + ("first_timestamp", "open")
+# Dropped by compaction, the daily OHLC is kept
+COMPACTED_FIELDS = ("timestamps", "prices")
+
+# The one document per price collection is renamed to this once migrated
+MIGRATED_STOCK_PRICES_COLLECTION = "stock_prices_migrated"
+
+
+class PlayerNotFoundError(ValueError):
+    """
+    A coin change targeted a player that does not exist
+    """
+
+    def __init__(self, player_id: int):
+        super().__init__(f"Player with ID {player_id} does not exist")
+        self.player_id = player_id
+
+
+class InsufficientCoinsError(ValueError):
+    """
+    A player could not cover a coin debit
+    """
 
 
 class DB:
@@ -22,9 +70,10 @@ class DB:
 
     def __init__(self, db_name: str = None):
         self.client = self.connect(db_name)
+        self._supports_transactions = None
 
     @staticmethod
-    def connect(db_name: str = None):
+    def get_mongo_uri() -> str:
         db_host = os.getenv("MONGO_HOST") or "mongo"
         db_user = os.getenv("MONGO_USER") or None
         db_pass = os.getenv("MONGO_PASS") or None
@@ -32,20 +81,390 @@ class DB:
         if db_user:
             db_user_quote = quote_plus(db_user)
             db_pass_quote = quote_plus(db_pass)
-            mongo_uri = f"mongodb+srv://{db_user_quote}:{db_pass_quote}@{db_host}"
-        else:
-            mongo_uri = f"mongodb://{db_host}"
+            return f"mongodb+srv://{db_user_quote}:{db_pass_quote}@{db_host}"
+
+        return f"mongodb://{db_host}"
 
+    @staticmethod
+    def connect(db_name: str = None):
+        db_host = os.getenv("MONGO_HOST") or "mongo"
         logging.info(f"Connecting to database host {db_host}...")
-        connect(db_name, host=mongo_uri)
+        client = connect(db_name, host=DB.get_mongo_uri())
+        DB.verify_indexes()
+        return client
+
+    @staticmethod
+    def verify_indexes():
+        """
+        Compares the indexes declared in the schema meta blocks with the ones
+        in the database. Missing indexes are created, undeclared and unused
+        indexes are logged
+        """
+        for document in INDEXED_DOCUMENTS:
+            collection_name = document._meta["collection"]
+            index_diff = document.compare_indexes()
+
+            for index in index_diff["missing"]:
+                logging.warning(
+                    "Index %s missing on %s, creating it", index, collection_name
+                )
+
+            if index_diff["missing"]:
+                document.ensure_indexes()
+
+            for index in index_diff["extra"]:
+                logging.info("Undeclared index %s on %s", index, collection_name)
+
+            try:
+                index_stats = list(
+                    document._get_collection().aggregate([{"$indexStats": {}}])
+                )
+            except OperationFailure as e:
+                logging.warning(
+                    "Could not read index usage of %s: %s", collection_name, e
+                )
+                continue
+
+            for index_stat in index_stats:
+                if index_stat["name"] == "_id_":
+                    continue
+
+                if index_stat["accesses"]["ops"] == 0:
+                    logging.info(
+                        "Index %s on %s has not been used since %s",
+                        index_stat["name"],
+                        collection_name,
+                        index_stat["accesses"]["since"],
+                    )
+
+    def supports_transactions(self) -> bool:
+        """
+        Multi-document transactions need a replica set or a sharded cluster
+        """
+        if self._supports_transactions is None:
+            hello = self.client.admin.command("hello")
+            self._supports_transactions = (
+                "setName" in hello or hello.get("msg") == "isdbgrid"
+            )
+
+        return self._supports_transactions
 
     # --- Player helper methods ---
 
     def get_player(self, player_id: int) -> Player:
         return Player.objects(id=player_id).first()
 
-    def get_players(self, skip: int = 0, limit: int = 0) -> List[Player]:
-        return list(Player.objects.skip(skip).limit(limit))
+    def get_or_create_player(self, player_id: int) -> Player:
+        """
+        Gets a player, inserting it with the default values if it does not
+        exist, in a single round trip
+        """
+        collection = Player._get_collection()
+        try:
+            player_son = collection.find_one_and_update(
+                {"_id": player_id},
+                self._player_defaults_update(player_id),
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # A concurrent upsert for the same new player won the insert
+            player_son = collection.find_one({"_id": player_id})
+
+        return Player._from_son(player_son)
+
+    @staticmethod
+    def _player_defaults_update(player_id: int) -> dict:
+        """
+        Upsert update inserting a player with the default values
+        """
+        defaults = dict(Player(id=player_id).to_mongo())
+        defaults.pop("_id")
+        return {"$setOnInsert": defaults}
+
+    def get_players(
+        self, skip: int = 0, limit: int = 0, fields: List[str] = None
+    ) -> List[Player]:
+        """
+        Gets players, only loading the given fields if any are given
+        """
+        query = Player.objects.skip(skip).limit(limit)
+        if fields:
+            query = query.only(*fields)
+        return list(query)
+
+    def get_players_as_dicts(
+        self, fields: List[str], skip: int = 0, limit: int = 0
+    ) -> List[dict]:
+        """
+        Gets raw player documents with only the given fields, skipping
+        Player construction. The ID is always included as "_id"
+        """
+        return list(Player.objects.skip(skip).limit(limit).only(*fields).as_pymongo())
+
+    def inc_player_coins(self, player_id: int, amount: int) -> Optional[int]:
+        """
+        Atomically adds amount to a player's coins, a negative amount is a
+        debit that is only applied if the player has enough coins
+
+        Returns the new balance, or None if nothing was updated
+        """
+        player_son = Player._get_collection().find_one_and_update(
+            self._coins_query(player_id, amount),
+            {"$inc": {"coins": amount}},
+            projection={"coins": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return player_son["coins"] if player_son else None
+
+    @staticmethod
+    def _coins_query(player_id: int, amount: int) -> dict:
+        """
+        Query matching the player if they can cover amount, when it is a debit
+        """
+        query = {"_id": player_id}
+        if amount < 0:
+            query["coins"] = {"$gte": -amount}
+        return query
+
+    def settle_player_coins(self, deltas: Dict[int, int]) -> Dict[int, int]:
+        """
+        Applies a set of coin deltas, keyed by player ID, all or nothing.
+        Debits are guarded server-side, if any player can't cover theirs no
+        delta is applied and an InsufficientCoinsError is raised. A
+        PlayerNotFoundError is raised if any player does not exist
+
+        With transaction support the deltas are one bulk write inside a
+        transaction. Otherwise they are staged in a CoinTransfer, which
+        recover_coin_transfers finishes or rolls back if the bot stops
+        halfway through
+
+        A single delta, or only credits, can't be half applied by a failed
+        debit and skips both, with one guarded $inc per player. Credits made
+        before a missing player is found are kept
+
+        Returns the new balance of every player with a non-zero delta
+        """
+        deltas = {player_id: delta for player_id, delta in deltas.items() if delta}
+
+        if not deltas:
+            return {}
+
+        if len(deltas) == 1 or min(deltas.values()) > 0:
+            return self._inc_players_coins(deltas)
+
+        if self.supports_transactions():
+            return self._settle_player_coins_in_transaction(deltas)
+
+        transfer = CoinTransfer(
+            deltas={str(player_id): delta for player_id, delta in deltas.items()}
+        )
+        transfer.save()
+        return self._apply_coin_transfer(transfer)
+
+    def _inc_players_coins(self, deltas: Dict[int, int]) -> Dict[int, int]:
+        balances = {}
+
+        for player_id, delta in deltas.items():
+            balance = self.inc_player_coins(player_id, delta)
+
+            if balance is None:
+                if not self.has_player(player_id):
+                    raise PlayerNotFoundError(player_id)
+                raise InsufficientCoinsError("Not enough coins")
+
+            balances[player_id] = balance
+
+        return balances
+
+    def recover_coin_transfers(self) -> None:
+        """
+        Finishes the coin transfers left pending by an interrupted settlement,
+        or rolls them back if they can no longer be applied, and drops the
+        IDs of finished transfers from the players
+        """
+        for transfer in CoinTransfer.objects:
+            logging.warning(
+                "Recovering %s coin transfer %s", transfer.state, transfer.id
+            )
+
+            if transfer.state == "canceling":
+                self._roll_back_coin_transfer(transfer)
+                continue
+
+            try:
+                self._apply_coin_transfer(transfer)
+            except ValueError as e:
+                logging.warning("Rolled back coin transfer %s: %s", transfer.id, e)
+
+        # IDs of transfers that finished before they were pulled
+        transfer_ids = [transfer.id for transfer in CoinTransfer.objects.only("id")]
+        Player._get_collection().update_many(
+            {"pending_transfers": {"$elemMatch": {"$nin": transfer_ids}}},
+            {"$pull": {"pending_transfers": {"$nin": transfer_ids}}},
+        )
+
+    def _apply_coin_transfer(self, transfer: CoinTransfer) -> Dict[int, int]:
+        """
+        Applies every delta of the transfer that has not been applied yet.
+        Players record the transfers applied to their balance, so this can
+        be repeated after a crash without applying a delta twice
+        """
+        collection = Player._get_collection()
+        balances = {}
+
+        for player_id, delta in transfer.get_deltas().items():
+            query = self._coins_query(player_id, delta)
+            query["pending_transfers"] = {"$ne": transfer.id}
+
+            player_son = collection.find_one_and_update(
+                query,
+                {"$inc": {"coins": delta}, "$push": {"pending_transfers": transfer.id}},
+                projection={"coins": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+
+            if player_son is None:
+                # Applied before an interrupted run of this transfer
+                player_son = collection.find_one(
+                    {"_id": player_id, "pending_transfers": transfer.id}, {"coins": 1}
+                )
+
+            if player_son is not None:
+                balances[player_id] = player_son["coins"]
+                continue
+
+            transfer.modify(set__state="canceling")
+            self._roll_back_coin_transfer(transfer)
+
+            if not collection.count_documents({"_id": player_id}, limit=1):
+                raise PlayerNotFoundError(player_id)
+            raise InsufficientCoinsError("Not enough coins")
+
+        # Deleted before the IDs are pulled, so recovery can never apply a
+        # finished transfer again. A crash in between only leaves unused IDs
+        transfer.delete()
+        collection.update_many(
+            {"_id": {"$in": list(balances)}},
+            {"$pull": {"pending_transfers": transfer.id}},
+        )
+        return balances
+
+    def _roll_back_coin_transfer(self, transfer: CoinTransfer) -> None:
+        collection = Player._get_collection()
+
+        for player_id, delta in transfer.get_deltas().items():
+            # Only reverts the players the transfer was applied to, once
+            collection.update_one(
+                {"_id": player_id, "pending_transfers": transfer.id},
+                {
+                    "$inc": {"coins": -delta},
+                    "$pull": {"pending_transfers": transfer.id},
+                },
+            )
+
+        transfer.delete()
+
+    def _settle_player_coins_in_transaction(
+        self, deltas: Dict[int, int]
+    ) -> Dict[int, int]:
+        collection = Player._get_collection()
+        operations = []
+
+        for player_id, delta in deltas.items():
+            query = self._coins_query(player_id, delta)
+            operations.append(UpdateOne(query, {"$inc": {"coins": delta}}))
+
+        with self.client.start_session() as session:
+            # Raising inside the transaction block aborts it
+            with session.start_transaction():
+                self._check_players_exist(deltas, session)
+                result = collection.bulk_write(operations, session=session)
+
+                if result.matched_count != len(operations):
+                    raise InsufficientCoinsError("Not enough coins")
+
+                players = collection.find(
+                    {"_id": {"$in": list(deltas)}}, {"coins": 1}, session=session
+                )
+                return {player["_id"]: player["coins"] for player in players}
+
+    @staticmethod
+    def _check_players_exist(player_ids: Iterable[int], session=None) -> None:
+        player_ids = list(player_ids)
+        players = Player._get_collection().find(
+            {"_id": {"$in": player_ids}}, {"_id": 1}, session=session
+        )
+        existing = {player["_id"] for player in players}
+
+        for player_id in player_ids:
+            if player_id not in existing:
+                raise PlayerNotFoundError(player_id)
+
+    def reward_all_players(
+        self,
+        amount: int,
+        boosted_amount: int,
+        boost_modifier: Modifier,
+        grant_modifier_id: str,
+    ) -> int:
+        """
+        Gives every player coins and a stack of a modifier in one bulk write.
+        Players with a valid boost_modifier get boosted_amount instead of
+        amount, the split is done server-side
+
+        Returns the number of players rewarded
+        """
+        operations = self._reward_operations(
+            amount, boosted_amount, boost_modifier, grant_modifier_id
+        )
+        result = Player._get_collection().bulk_write(operations)
+        return result.matched_count
+
+    @staticmethod
+    def _reward_operations(
+        amount: int,
+        boosted_amount: int,
+        boost_modifier: Modifier,
+        grant_modifier_id: str,
+    ) -> List[UpdateMany]:
+        """
+        Bulk write operations for reward_all_players
+        """
+        boosted_query = DB._valid_modifier_query(boost_modifier)
+        granted_field = f"modifiers.{grant_modifier_id}"
+        now = datetime.datetime.utcnow()
+
+        def reward(coins: int) -> dict:
+            # Same effect as Player.add_modifier for new and existing modifiers
+            return {
+                "$inc": {"coins": coins, f"{granted_field}.stacks": 1},
+                "$set": {
+                    f"{granted_field}._id": grant_modifier_id,
+                    f"{granted_field}.last_used": now,
+                },
+            }
+
+        return [
+            UpdateMany(boosted_query, reward(boosted_amount)),
+            UpdateMany({"$nor": [boosted_query]}, reward(amount)),
+        ]
+
+    @staticmethod
+    def _valid_modifier_query(modifier: Modifier) -> dict:
+        """
+        Query matching the players for which Player.is_modifier_valid is True
+        """
+        modifier_field = f"modifiers.{modifier.id}"
+        query = {f"{modifier_field}.stacks": {"$gte": 1}}
+
+        if modifier.is_timed:
+            expiry = datetime.datetime.utcnow() - datetime.timedelta(
+                hours=modifier.duration
+            )
+            query[f"{modifier_field}.last_used"] = {"$gt": expiry}
+
+        return query
 
     def add_player(self, player: Player) -> str:
         player.save()
@@ -65,42 +484,90 @@ class DB:
     def get_item(self, item_id: str) -> Item:
         return Item.objects(id=item_id).first()
 
-    def get_items(self, skip: int = 0, limit: int = 0) -> List[Item]:
-        return list(Item.objects.skip(skip).limit(limit))
-
-    def add_item(self, item: Item) -> str:
-        item.save()
-        return str(item.id)
+    def get_items(
+        self, skip: int = 0, limit: int = 0, fields: List[str] = None
+    ) -> List[Item]:
+        query = Item.objects.skip(skip).limit(limit)
+        if fields:
+            query = query.only(*fields)
+        return list(query)
 
     def has_item(self, item_id: str) -> bool:
         return Item.objects(id=item_id).count() > 0
 
     def delete_item(self, item_id: str) -> None:
         Item.objects(id=item_id).delete()
-
-    def delete_all_items(self):
-        Item.objects.delete()
+        self.clear_catalog_hash(Item)
 
     # --- Modifier helper methods ---
 
     def get_modifier(self, modifier_id: str) -> Modifier:
         return Modifier.objects(id=modifier_id).first()
 
-    def get_modifiers(self, skip: int = 0, limit: int = 0) -> List[Modifier]:
-        return list(Modifier.objects.skip(skip).limit(limit))
-
-    def add_modifier(self, modifier: Modifier) -> str:
-        modifier.save()
-        return str(modifier.id)
+    def get_modifiers(
+        self, skip: int = 0, limit: int = 0, fields: List[str] = None
+    ) -> List[Modifier]:
+        query = Modifier.objects.skip(skip).limit(limit)
+        if fields:
+            query = query.only(*fields)
+        return list(query)
 
     def has_modifier(self, modifier_id: str) -> bool:
         return Modifier.objects(id=modifier_id).count() > 0
 
     def delete_modifier(self, modifier_id: str) -> None:
         Modifier.objects(id=modifier_id).delete()
+        self.clear_catalog_hash(Modifier)
+
+    # --- Catalog helper methods ---
+
+    def get_catalog_hash(self, product_cls: Type[Product]) -> Optional[str]:
+        state = CatalogState.objects(id=product_cls._meta["collection"]).first()
+        return state.content_hash if state else None
+
+    def clear_catalog_hash(self, product_cls: Type[Product]) -> None:
+        """
+        Forgets the last sync, so the next start syncs the products file again
+        """
+        CatalogState.objects(id=product_cls._meta["collection"]).delete()
+
+    def sync_products(
+        self, product_cls: Type[Product], products: List[Product], content_hash: str
+    ) -> Dict[str, int]:
+        """
+        Makes the stored products of a collection match the given ones with a
+        single bulk write of only the needed inserts, replaces and deletes,
+        then records the content hash they were synced from
+
+        Returns the number of inserted, updated and deleted products
+        """
+        collection = product_cls._get_collection()
+        stored = {son["_id"]: son for son in collection.find()}
+        wanted = {product.id: product.to_mongo().to_dict() for product in products}
+
+        operations = []
+        counts = {"inserted": 0, "updated": 0, "deleted": 0}
+
+        for product_id, son in wanted.items():
+            if product_id not in stored:
+                operations.append(InsertOne(son))
+                counts["inserted"] += 1
+            elif stored[product_id] != son:
+                operations.append(ReplaceOne({"_id": product_id}, son))
+                counts["updated"] += 1
+
+        removed_ids = [product_id for product_id in stored if product_id not in wanted]
+        if removed_ids:
+            operations.append(DeleteMany({"_id": {"$in": removed_ids}}))
+            counts["deleted"] = len(removed_ids)
 
-    def delete_all_modifiers(self):
-        Modifier.objects.delete()
+        if operations:
+            collection.bulk_write(operations)
+
+        CatalogState.objects(id=product_cls._meta["collection"]).update_one(
+            set__content_hash=content_hash, upsert=True
+        )
+        return counts
 
     # --- Crossword helper methods ---
 
@@ -134,6 +601,12 @@ class DB:
         query = {f"players.{player_id}": {"$exists": True}}
         return list(Roulette.objects(__raw__=query).skip(skip).limit(limit))
 
+    def iter_roulettes_by_player(
+        self, player_id: int, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[Roulette]:
+        query = {f"players.{player_id}": {"$exists": True}}
+        yield from Roulette.objects(__raw__=query).no_cache().batch_size(batch_size)
+
     def add_roulette(self, roulette: Roulette) -> str:
         roulette.save()
         return str(roulette.id)
@@ -151,6 +624,11 @@ class DB:
     ) -> List[HorseRace]:
         return list(HorseRace.objects(player=player_id).skip(skip).limit(limit))
 
+    def iter_horse_races_by_player(
+        self, player_id: int, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[HorseRace]:
+        yield from HorseRace.objects(player=player_id).no_cache().batch_size(batch_size)
+
     def add_horse_race(self, horse_race: HorseRace) -> str:
         horse_race.save()
         return str(horse_race.id)
@@ -173,6 +651,31 @@ class DB:
     def update_stock(self, stock: Stock) -> None:
         Stock.objects(ticker=stock.ticker).update_one(**stock.to_mongo())
 
+    def update_stock_return_moments(
+        self, moments: Dict[str, Tuple[int, float, float]]
+    ) -> None:
+        """
+        Sets the (count, mean, m2) return moments of many stocks at once
+        """
+        if not moments:
+            return
+
+        Stock._get_collection().bulk_write(
+            [
+                UpdateOne(
+                    {"ticker": ticker},
+                    {
+                        "$set": {
+                            "return_count": count,
+                            "return_mean": mean,
+                            "return_m2": m2,
+                        }
+                    },
+                )
+                for ticker, (count, mean, m2) in moments.items()
+            ]
+        )
+
     def has_stock(self, ticker: str) -> bool:
         return Stock.objects(ticker=ticker).count() > 0
 
@@ -184,36 +687,647 @@ class DB:
 
     # --- StockPrice helper methods ---
 
-    def get_current_stock_price(self, ticker: str) -> StockPrice:
-        return StockPrice.objects(ticker=ticker).order_by("-timestamp").first()
+    def get_current_stock_price(self, ticker: str) -> Optional[StockPrice]:
+        bucket = (
+            StockPriceBucket.objects(ticker=ticker)
+            .order_by("-day")
+            .only("ticker", "last_timestamp", "close")
+            .as_pymongo()
+            .first()
+        )
+        return self._get_bucket_close(bucket) if bucket else None
+
+    def get_current_stock_prices(self) -> List[StockPrice]:
+        """
+        Gets the latest price of every ticker in one aggregation
+        """
+        pipeline = [
+            {"$sort": {"ticker": -1, "day": -1}},
+            {
+                "$group": {
+                    "_id": "$ticker",
+                    "ticker": {"$first": "$ticker"},
+                    "last_timestamp": {"$first": "$last_timestamp"},
+                    "close": {"$first": "$close"},
+                }
+            },
+        ]
+        return [
+            self._get_bucket_close(bucket)
+            for bucket in StockPriceBucket.objects.aggregate(pipeline)
+        ]
+
+    def get_stock_price_at(
+        self, ticker: str, timestamp: datetime.datetime
+    ) -> Optional[StockPrice]:
+        """
+        Gets the latest price of the ticker at or before timestamp
+        """
+        bucket = (
+            StockPriceBucket.objects(
+                ticker=ticker, day__lte=timestamp, first_timestamp__lte=timestamp
+            )
+            .order_by("-day")
+            .only(*PRICE_AT_FIELDS)
+            .as_pymongo()
+            .first()
+        )
+        return self._get_bucket_price_at(bucket, timestamp) if bucket else None
+
+    def get_stock_prices_at(
+        self, tickers: List[str], timestamps: Dict[str, datetime.datetime]
+    ) -> Dict[str, Dict[str, Optional[StockPrice]]]:
+        """
+        Batched get_stock_price_at for every ticker at every named timestamp,
+        in one aggregation
 
-    def get_stock_price_by_date(
-        self, ticker: str, date: datetime.datetime
-    ) -> StockPrice:
-        start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_date = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-        return StockPrice.objects(
-            ticker=ticker, timestamp__gte=start_date, timestamp__lte=end_date
-        ).first()
+        Returns a dict keyed by ticker, then by the names in timestamps, with
+        None where the ticker has no price that old
+        """
+        bucket = {"day": "$day", **{field: f"${field}" for field in PRICE_AT_FIELDS}}
+
+        def latest_bucket(timestamp: datetime.datetime) -> dict:
+            # Days are unique per ticker and compare first, so $max picks the
+            # latest bucket that started at or before timestamp
+            at_or_before = {"$lte": ["$first_timestamp", timestamp]}
+            return {"$max": {"$cond": [at_or_before, bucket, None]}}
+
+        latest = max(timestamps.values())
+        pipeline = [
+            {
+                "$match": {
+                    "ticker": {"$in": tickers},
+                    "day": {"$lte": latest},
+                    "first_timestamp": {"$lte": latest},
+                }
+            },
+            {"$project": {"day": 1, **{field: 1 for field in PRICE_AT_FIELDS}}},
+            {"$sort": {"ticker": 1, "day": -1}},
+            {
+                "$group": {
+                    "_id": "$ticker",
+                    **{
+                        name: latest_bucket(timestamp)
+                        for name, timestamp in timestamps.items()
+                    },
+                }
+            },
+        ]
+
+        stock_prices = {
+            ticker: {name: None for name in timestamps} for ticker in tickers
+        }
+        for row in StockPriceBucket.objects.aggregate(pipeline):
+            for name, timestamp in timestamps.items():
+                if row[name]:
+                    price = self._get_bucket_price_at(row[name], timestamp)
+                    stock_prices[row["_id"]][name] = price
+        return stock_prices
+
+    def get_market_prices(
+        self,
+        tickers: List[str],
+        day_date: datetime.datetime,
+        week_date: datetime.datetime,
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Gets the current price of the tickers and their latest prices at or
+        before day_date and week_date, in one aggregation
+
+        Returns a dict keyed by ticker with "current", "day" and "week" prices,
+        "day" and "week" are None if there is no price that old. Tickers with
+        no price since a day before the oldest date are left out
+        """
+
+        def latest_price(before: datetime.datetime = None) -> dict:
+            # Documents compare field by field, so $max picks the latest timestamp
+            price_point = {"timestamp": "$timestamp", "price": "$price"}
+            if before is None:
+                return {"$max": price_point}
+            return {
+                "$max": {"$cond": [{"$lte": ["$timestamp", before]}, price_point, None]}
+            }
+
+        # Allow a day of missing prices, e.g. if the bot was down
+        oldest = min(day_date, week_date) - datetime.timedelta(days=1)
+        pipeline = [
+            {
+                "$match": {
+                    "ticker": {"$in": tickers},
+                    "day": {"$gte": self.get_bucket_day(oldest)},
+                }
+            },
+            {
+                "$project": {
+                    "ticker": 1,
+                    # Compacted buckets only hold their close
+                    "points": {
+                        "$cond": [
+                            {"$isArray": "$timestamps"},
+                            {"$zip": {"inputs": ["$timestamps", "$prices"]}},
+                            [["$last_timestamp", "$close"]],
+                        ]
+                    },
+                }
+            },
+            {"$unwind": "$points"},
+            {
+                "$project": {
+                    "ticker": 1,
+                    "timestamp": {"$arrayElemAt": ["$points", 0]},
+                    "price": {"$arrayElemAt": ["$points", 1]},
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$ticker",
+                    "current": latest_price(),
+                    "day": latest_price(day_date),
+                    "week": latest_price(week_date),
+                }
+            },
+        ]
+
+        market_prices = {}
+        for row in StockPriceBucket.objects.aggregate(pipeline):
+            market_prices[row["_id"]] = {
+                key: row[key]["price"] if row[key] else None
+                for key in ("current", "day", "week")
+            }
+        return market_prices
 
     def get_stock_price_in_date_range(
         self, ticker: str, start_date: datetime.datetime, end_date: datetime.datetime
     ) -> List[StockPrice]:
-        return list(
-            StockPrice.objects(
-                ticker=ticker, timestamp__gte=start_date, timestamp__lte=end_date
-            )
+        return list(self.iter_stock_price_in_date_range(ticker, start_date, end_date))
+
+    def iter_stock_price_in_date_range(
+        self,
+        ticker: str,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        daily: bool = False,
+    ) -> Iterator[StockPrice]:
+        """
+        With daily set only the closing price of each day is read
+        """
+        buckets = self._iter_stock_price_buckets(
+            ticker, start_date, end_date, batch_size, daily
         )
+        for bucket in buckets:
+            yield from self._unpack_bucket(bucket, start_date, end_date)
 
     def get_stock_price_history(self, ticker: str) -> List[StockPrice]:
-        return list(StockPrice.objects(ticker=ticker).order_by("timestamp"))
+        return list(self.iter_stock_price_history(ticker))
+
+    def iter_stock_price_history(
+        self, ticker: str, batch_size: int = DEFAULT_BATCH_SIZE, daily: bool = False
+    ) -> Iterator[StockPrice]:
+        """
+        With daily set only the closing price of each day is read
+        """
+        buckets = self._iter_stock_price_buckets(
+            ticker, batch_size=batch_size, daily=daily
+        )
+        for bucket in buckets:
+            yield from self._unpack_bucket(bucket)
+
+    def count_stock_prices(
+        self,
+        ticker: str,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        daily: bool = False,
+    ) -> int:
+        """
+        Counts the prices the iter_* getters yield for the same arguments. With
+        daily set that is the number of days with prices
+        """
+        if daily:
+            return self._get_stock_price_buckets(ticker, start_date, end_date).count()
+
+        match = {"ticker": ticker}
+        in_range = []
+
+        if start_date:
+            match.setdefault("day", {})["$gte"] = self.get_bucket_day(start_date)
+            in_range.append({"$gte": ["$$timestamp", start_date]})
+        if end_date:
+            match.setdefault("day", {})["$lte"] = end_date
+            in_range.append({"$lte": ["$$timestamp", end_date]})
+
+        # Only the buckets at the edges of the range are partly counted
+        count = "$count"
+        if in_range:
+            count = {
+                "$size": {
+                    "$filter": {
+                        "input": {"$ifNull": ["$timestamps", ["$last_timestamp"]]},
+                        "as": "timestamp",
+                        "cond": {"$and": in_range},
+                    }
+                }
+            }
+
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": None, "count": {"$sum": count}}},
+        ]
+        rows = list(StockPriceBucket.objects.aggregate(pipeline))
+        return rows[0]["count"] if rows else 0
+
+    def get_downsampled_stock_prices(
+        self,
+        ticker: str,
+        nr_points: int,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        daily: bool = False,
+    ) -> List[StockPrice]:
+        """
+        Downsamples the prices the iter_* getters yield for the same arguments
+        to at most nr_points in the database. $bucketAuto splits them into
+        nr_points / 4 groups of about the same size, and each group keeps its
+        first, lowest, highest and last price, so spikes and crashes survive
+        """
+        match = {"ticker": ticker}
+        in_range = {}
+
+        if start_date:
+            match.setdefault("day", {})["$gte"] = self.get_bucket_day(start_date)
+            in_range["$gte"] = start_date
+        if end_date:
+            match.setdefault("day", {})["$lte"] = end_date
+            in_range["$lte"] = end_date
+
+        if daily:
+            points = [["$last_timestamp", "$close"]]
+        else:
+            points = {
+                "$zip": {
+                    "inputs": [
+                        {"$ifNull": ["$timestamps", ["$last_timestamp"]]},
+                        {"$ifNull": ["$prices", ["$close"]]},
+                    ]
+                }
+            }
+
+        pipeline = [
+            {"$match": match},
+            {"$project": {"points": points}},
+            {"$unwind": "$points"},
+            {
+                "$project": {
+                    "timestamp": {"$arrayElemAt": ["$points", 0]},
+                    "price": {"$arrayElemAt": ["$points", 1]},
+                }
+            },
+        ]
+
+        if in_range:
+            pipeline.append({"$match": {"timestamp": in_range}})
+
+        # Documents compare field by field, so these pick the earliest and
+        # latest timestamp, and the lowest and highest price
+        by_timestamp = {"timestamp": "$timestamp", "price": "$price"}
+        by_price = {"price": "$price", "timestamp": "$timestamp"}
+        pipeline.append(
+            {
+                "$bucketAuto": {
+                    "groupBy": "$timestamp",
+                    "buckets": max(nr_points // 4, 1),
+                    "output": {
+                        "first": {"$min": by_timestamp},
+                        "low": {"$min": by_price},
+                        "high": {"$max": by_price},
+                        "last": {"$max": by_timestamp},
+                    },
+                }
+            }
+        )
+
+        rows = StockPriceBucket.objects.aggregate(pipeline, allowDiskUse=True)
+        return self._get_downsampled_prices(ticker, rows)
 
     def has_stock_price(self, ticker: str) -> bool:
-        return StockPrice.objects(ticker=ticker).count() > 0
+        return StockPriceBucket.objects(ticker=ticker).count() > 0
 
-    def add_stock_price(self, stock_price: StockPrice) -> str:
-        stock_price.save()
-        return str(stock_price.id)
+    def add_stock_price(self, stock_price: StockPrice) -> None:
+        self.add_stock_prices([stock_price])
+
+    def add_stock_prices(self, stock_prices: Iterable[StockPrice]) -> int:
+        """
+        Appends prices to the day buckets of their tickers with one upsert per
+        bucket. Prices must be in timestamp order and newer than the prices
+        already stored for their ticker
+
+        Returns the number of prices added
+        """
+        buckets = {}
+        for stock_price in stock_prices:
+            day = self.get_bucket_day(stock_price.timestamp)
+            buckets.setdefault((stock_price.ticker, day), []).append(stock_price)
+
+        if not buckets:
+            return 0
+
+        operations = [
+            self._append_to_bucket(
+                ticker,
+                day,
+                [stock_price.timestamp for stock_price in bucket_prices],
+                [int(stock_price.price) for stock_price in bucket_prices],
+            )
+            for (ticker, day), bucket_prices in buckets.items()
+        ]
+        StockPriceBucket._get_collection().bulk_write(operations)
+        return sum(len(bucket_prices) for bucket_prices in buckets.values())
+
+    def add_stock_price_arrays(
+        self, prices_by_ticker: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    ) -> int:
+        """
+        Like add_stock_prices, for prices given per ticker as timestamp and
+        price arrays. The arrays are split into buckets without building a
+        document per price
+
+        Returns the number of prices added
+        """
+        operations = [
+            self._append_to_bucket(ticker, day, timestamps, prices)
+            for ticker, day, timestamps, prices in self._split_into_buckets(
+                prices_by_ticker
+            )
+        ]
+
+        if operations:
+            StockPriceBucket._get_collection().bulk_write(operations)
+
+        return sum(len(prices) for _, prices in prices_by_ticker.values())
+
+    def insert_stock_price_arrays(
+        self, prices_by_ticker: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    ) -> int:
+        """
+        Like add_stock_price_arrays but with plain inserts of whole buckets,
+        for tickers that have no prices stored yet
+
+        Returns the number of prices added
+        """
+        buckets = [
+            self._new_bucket(ticker, day, timestamps, prices)
+            for ticker, day, timestamps, prices in self._split_into_buckets(
+                prices_by_ticker
+            )
+        ]
+
+        if buckets:
+            StockPriceBucket._get_collection().insert_many(buckets)
+
+        return sum(len(prices) for _, prices in prices_by_ticker.values())
+
+    def migrate_stock_prices(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, drop: bool = False
+    ) -> int:
+        """
+        Moves prices from the one document per price stock_prices collection
+        into day buckets. Per ticker only prices newer than the latest
+        bucketed price are copied, so an interrupted migration can be rerun.
+        This relies on nothing else adding buckets until it has finished
+
+        Afterwards the old collection is dropped, or renamed to
+        MIGRATED_STOCK_PRICES_COLLECTION as a backup
+
+        Returns the number of prices migrated
+        """
+        migrated = 0
+
+        for ticker in StockPrice.objects.distinct("ticker"):
+            query = StockPrice.objects(ticker=ticker)
+
+            latest = self.get_current_stock_price(ticker)
+            if latest:
+                query = query.filter(timestamp__gt=latest.timestamp)
+
+            batch = []
+            for stock_price in (
+                query.order_by("timestamp").no_cache().batch_size(batch_size)
+            ):
+                batch.append(stock_price)
+
+                if len(batch) == batch_size:
+                    migrated += self.add_stock_prices(batch)
+                    batch = []
+
+            migrated += self.add_stock_prices(batch)
+            logging.info(f"Migrated stock prices of ${ticker}")
+
+        legacy_stock_prices = self._get_legacy_stock_prices()
+        if drop:
+            legacy_stock_prices.drop()
+        elif legacy_stock_prices.estimated_document_count():
+            legacy_stock_prices.rename(
+                MIGRATED_STOCK_PRICES_COLLECTION, dropTarget=True
+            )
+
+        return migrated
+
+    def has_legacy_stock_prices(self) -> bool:
+        """
+        Whether the one document per price stock_prices collection still holds
+        prices that have not been migrated to buckets
+        """
+        return self._get_legacy_stock_prices().estimated_document_count() > 0
+
+    @staticmethod
+    def _get_legacy_stock_prices():
+        # Skips StockPrice._get_collection, which would create the collection
+        return StockPrice._get_db()[StockPrice._meta["collection"]]
+
+    def compact_stock_prices(self, before: datetime.datetime) -> int:
+        """
+        Drops the individual prices of the buckets of days before the given
+        day and keeps their daily OHLC. Compacted days read as one price, the
+        closing price
+
+        Returns the number of buckets compacted
+        """
+        result = StockPriceBucket._get_collection().update_many(
+            {"day": {"$lt": before}, "timestamps": {"$exists": True}},
+            {"$unset": dict.fromkeys(COMPACTED_FIELDS, ""), "$set": {"count": 1}},
+        )
+        return result.modified_count
 
     def delete_all_stock_prices(self):
-        StockPrice.objects.delete()
+        StockPriceBucket.objects.delete()
+
+    @staticmethod
+    def get_bucket_day(timestamp: datetime.datetime) -> datetime.datetime:
+        """
+        Start of the day bucket a timestamp belongs to
+        """
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _split_into_buckets(
+        prices_by_ticker: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    ) -> Iterator[Tuple[str, datetime.datetime, list, list]]:
+        """
+        Splits timestamp ordered price arrays at day boundaries into
+        (ticker, day, timestamps, prices) with integer prices
+        """
+        for ticker, (timestamps, prices) in prices_by_ticker.items():
+            timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+            prices = np.asarray(prices).astype(np.int64)
+
+            if len(timestamps) == 0:
+                continue
+
+            days = timestamps.astype("datetime64[D]")
+            starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+            ends = np.r_[starts[1:], len(days)]
+
+            for start, end in zip(starts, ends):
+                yield (
+                    ticker,
+                    days[start].astype("datetime64[us]").item(),
+                    timestamps[start:end].tolist(),
+                    prices[start:end].tolist(),
+                )
+
+    @staticmethod
+    def _get_downsampled_prices(ticker: str, rows: Iterable[dict]) -> List[StockPrice]:
+        """
+        The first, lowest, highest and last price of every $bucketAuto group in
+        timestamp order, each point once when they coincide
+        """
+        stock_prices = []
+        for row in rows:
+            points = {}
+            for key in ("first", "low", "high", "last"):
+                points[row[key]["timestamp"]] = row[key]["price"]
+
+            stock_prices.extend(
+                StockPrice(ticker=ticker, timestamp=timestamp, price=price)
+                for timestamp, price in sorted(points.items())
+            )
+        return stock_prices
+
+    @staticmethod
+    def _new_bucket(
+        ticker: str, day: datetime.datetime, timestamps: list, prices: list
+    ) -> dict:
+        return {
+            "ticker": ticker,
+            "day": day,
+            "count": len(prices),
+            "first_timestamp": timestamps[0],
+            "last_timestamp": timestamps[-1],
+            "open": prices[0],
+            "high": max(prices),
+            "low": min(prices),
+            "close": prices[-1],
+            "timestamps": timestamps,
+            "prices": prices,
+        }
+
+    @staticmethod
+    def _append_to_bucket(
+        ticker: str, day: datetime.datetime, timestamps: list, prices: list
+    ) -> UpdateOne:
+        return UpdateOne(
+            {"ticker": ticker, "day": day},
+            {
+                "$push": {
+                    "timestamps": {"$each": timestamps},
+                    "prices": {"$each": prices},
+                },
+                "$inc": {"count": len(prices)},
+                "$min": {"first_timestamp": timestamps[0], "low": min(prices)},
+                "$max": {"last_timestamp": timestamps[-1], "high": max(prices)},
+                "$set": {"close": prices[-1]},
+                "$setOnInsert": {"open": prices[0]},
+            },
+            upsert=True,
+        )
+
+    def _get_stock_price_buckets(
+        self,
+        ticker: str,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+    ):
+        query = StockPriceBucket.objects(ticker=ticker)
+        if start_date:
+            query = query.filter(day__gte=self.get_bucket_day(start_date))
+        if end_date:
+            query = query.filter(day__lte=end_date)
+        return query
+
+    def _iter_stock_price_buckets(
+        self,
+        ticker: str,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        daily: bool = False,
+    ) -> Iterator[dict]:
+        fields = DAILY_BUCKET_FIELDS if daily else BUCKET_FIELDS
+
+        yield from (
+            self._get_stock_price_buckets(ticker, start_date, end_date)
+            .order_by("day")
+            .only(*fields)
+            .as_pymongo()
+            .no_cache()
+            .batch_size(batch_size)
+        )
+
+    @staticmethod
+    def _unpack_bucket(
+        bucket: dict,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+    ) -> Iterator[StockPrice]:
+        if "timestamps" in bucket:
+            points = zip(bucket["timestamps"], bucket["prices"])
+        else:
+            # Compacted, or read at daily resolution
+            points = [(bucket["last_timestamp"], bucket["close"])]
+
+        for timestamp, price in points:
+            if start_date and timestamp < start_date:
+                continue
+            if end_date and timestamp > end_date:
+                break
+
+            yield StockPrice(ticker=bucket["ticker"], timestamp=timestamp, price=price)
+
+    @staticmethod
+    def _get_bucket_price_at(bucket: dict, timestamp: datetime.datetime) -> StockPrice:
+        if "timestamps" not in bucket:
+            # Compacted, the close is only known once the bucket has ended
+            if bucket["last_timestamp"] <= timestamp:
+                return DB._get_bucket_close(bucket)
+
+            return StockPrice(
+                ticker=bucket["ticker"],
+                timestamp=bucket["first_timestamp"],
+                price=bucket["open"],
+            )
+
+        i = bisect.bisect_right(bucket["timestamps"], timestamp) - 1
+        return StockPrice(
+            ticker=bucket["ticker"],
+            timestamp=bucket["timestamps"][i],
+            price=bucket["prices"][i],
+        )
+
+    @staticmethod
+    def _get_bucket_close(bucket: dict) -> StockPrice:
+        return StockPrice(
+            ticker=bucket["ticker"],
+            timestamp=bucket["last_timestamp"],
+            price=bucket["close"],
+        )
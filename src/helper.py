@@ -1,4 +1,6 @@
+import json
 import random
+import hashlib
 from datetime import datetime
 from datetime import timedelta
 from typing import List
@@ -102,6 +104,20 @@ def is_message_url(message: str) -> bool:
     return validators.url(message)
 
 
+def get_content_hash(data) -> str:
+    """
+    Computes a hash of JSON serializable data that does not depend on key order.
+
+    Parameters:
+    - data: The data to hash.
+
+    Returns:
+    - str: Hex digest of the SHA-256 hash of the data.
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 def closest_match(query: str, choices: List[str]):
     best_match = process.extractOne(query, choices)
     return best_match[0]
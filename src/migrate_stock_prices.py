@@ -0,0 +1,37 @@
+"""
+Moves stock prices from the one document per price stock_prices collection
+into the day buckets of stock_price_buckets
+
+The bot runs the migration at startup, before simulating initial prices.
+Run this with the bot stopped to migrate ahead of time. Rerunning it is safe,
+per ticker only prices newer than the latest bucketed price are copied
+
+Usage: python src/migrate_stock_prices.py [--drop]
+"""
+
+import argparse
+import logging
+from dotenv import load_dotenv
+
+from db import DB
+from log import set_up_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate stock prices to buckets")
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="drop the stock_prices collection instead of keeping it as a backup",
+    )
+    args = parser.parse_args()
+
+    db = DB("wapo")
+    migrated = db.migrate_stock_prices(drop=args.drop)
+    logging.info(f"Migrated {migrated} stock prices")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    set_up_logger(True)
+    main()
@@ -0,0 +1,49 @@
+"""
+Downloads the historical prices of the real tickers in data/stocks.json that
+are missing from the seed store in data/stock_seeds, in one batched download
+
+Usage: python src/refresh_stock_seeds.py [--all]
+"""
+
+import json
+import argparse
+import logging
+
+from classes.stock_sim import StockSim
+from classes.price_seed_store import PriceSeedStore
+from log import set_up_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the stock price seeds")
+    parser.add_argument(
+        "--all", action="store_true", help="download stored tickers again too"
+    )
+    args = parser.parse_args()
+
+    seed_store = PriceSeedStore("data/stock_seeds")
+    stock_sim = StockSim()
+
+    with open("data/stocks.json", "r") as file:
+        tickers = [stock_dict["real_ticker"] for stock_dict in json.load(file)]
+
+    if not args.all:
+        tickers = seed_store.get_missing(tickers)
+
+    if not tickers:
+        return
+
+    historical_prices = stock_sim.download_many_historical_prices(tickers)
+
+    for ticker in tickers:
+        if ticker not in historical_prices:
+            logging.error(f"Could not download prices of {ticker}")
+            continue
+
+        seed_store.save(ticker, historical_prices[ticker])
+        logging.info(f"Stored prices of {ticker}")
+
+
+if __name__ == "__main__":
+    set_up_logger(True)
+    main()
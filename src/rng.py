@@ -0,0 +1,63 @@
+import os
+import random
+import hashlib
+from typing import Dict, Optional
+import numpy as np
+
+_seed = None
+_randoms: Dict[str, random.Random] = {}
+_generators: Dict[str, np.random.Generator] = {}
+
+
+def get_seed() -> Optional[int]:
+    """
+    Seed set with set_seed, or from the WAPO_SEED environment variable. None
+    means the generators are seeded from the OS
+    """
+    if _seed is not None:
+        return _seed
+
+    seed = os.getenv("WAPO_SEED")
+    return int(seed) if seed else None
+
+
+def set_seed(seed: Optional[int]) -> None:
+    """
+    Reseeds every subsystem, e.g. to replay the same benchmark workload.
+    Objects keep the generators they were created with
+    """
+    global _seed
+    _seed = seed
+    _randoms.clear()
+    _generators.clear()
+
+
+def get_random(subsystem: str) -> random.Random:
+    """
+    Shared random.Random of a subsystem. Each subsystem gets its own stream
+    derived from the seed, so draws in one never shift another
+    """
+    if subsystem not in _randoms:
+        _randoms[subsystem] = random.Random(_get_subsystem_seed(subsystem))
+
+    return _randoms[subsystem]
+
+
+def get_generator(subsystem: str) -> np.random.Generator:
+    """
+    Shared numpy Generator of a subsystem, see get_random
+    """
+    if subsystem not in _generators:
+        _generators[subsystem] = np.random.default_rng(_get_subsystem_seed(subsystem))
+
+    return _generators[subsystem]
+
+
+def _get_subsystem_seed(subsystem: str) -> Optional[int]:
+    seed = get_seed()
+
+    if seed is None:
+        return None
+
+    digest = hashlib.sha256(f"{seed}:{subsystem}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
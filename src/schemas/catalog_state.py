@@ -0,0 +1,12 @@
+from mongoengine import Document, StringField
+
+
+class CatalogState(Document):
+    """
+    Content hash of the data a product collection was last synced from
+    """
+
+    id = StringField(primary_key=True)  # Name of the synced collection
+    content_hash = StringField(required=True)
+
+    meta = {"collection": "catalog_state"}
@@ -0,0 +1,21 @@
+from mongoengine import Document, IntField, MapField, StringField
+
+
+class CoinTransfer(Document):
+    """
+    A coin settlement, staged before any balance changes so an interrupted
+    one can be finished or rolled back
+    """
+
+    # Player ID (as a string, map keys must be strings) to coin delta
+    deltas = MapField(field=IntField(), required=True)
+    state = StringField(default="pending", choices=("pending", "canceling"))
+
+    meta = {"collection": "coin_transfers"}
+
+    def get_deltas(self) -> dict:
+        """
+        Deltas keyed by player ID, debits first
+        """
+        deltas = {int(player_id): delta for player_id, delta in self.deltas.items()}
+        return dict(sorted(deltas.items(), key=lambda item: item[1]))
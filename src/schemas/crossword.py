@@ -9,4 +9,4 @@ class Crossword(Document):
     date = StringField(required=True)
     time = IntField(required=True)
 
-    meta = {"collection": "crosswords"}
+    meta = {"collection": "crosswords", "indexes": ["date"]}
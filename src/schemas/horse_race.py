@@ -11,4 +11,4 @@ class HorseRace(Document):
     bet = IntField(required=True)
     win = IntField(required=True)
 
-    meta = {"collection": "horse_races"}
+    meta = {"collection": "horse_races", "indexes": ["player"]}
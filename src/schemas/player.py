@@ -1,6 +1,14 @@
 from datetime import datetime
 from typing import Dict
-from mongoengine import Document, EmbeddedDocumentField, IntField, StringField, MapField
+from mongoengine import (
+    Document,
+    EmbeddedDocumentField,
+    IntField,
+    ListField,
+    MapField,
+    ObjectIdField,
+    StringField,
+)
 from schemas.player_item import PlayerItem
 from schemas.player_modifier import PlayerModifier
 from schemas.player_avatar import PlayerAvatar
@@ -22,6 +30,8 @@ class Player(Document):
     modifiers = MapField(EmbeddedDocumentField(PlayerModifier), default=lambda: {})
     avatars = MapField(EmbeddedDocumentField(PlayerAvatar), default=lambda: {})
     holdings = MapField(EmbeddedDocumentField(PlayerHolding), default=lambda: {})
+    # CoinTransfers applied to the balance but not finished yet
+    pending_transfers = ListField(ObjectIdField())
 
     meta = {"collection": "players"}
 
@@ -35,26 +45,26 @@ class Player(Document):
     def get_coins(self) -> int:
         return self.coins
 
-    def add_coins(self, amount: int):
+    def add_coins(self, amount: int) -> int:
         if amount < 0:
             raise ValueError("Can't add negative coins")
 
-        self.coins += amount
-        self.save()
+        self.modify(inc__coins=amount)
+        return self.coins
 
-    def remove_coins(self, amount: int):
+    def remove_coins(self, amount: int) -> int:
         if amount < 0:
             raise ValueError("Can't remove negative coins")
 
-        if self.coins < amount:
+        # Guard on the stored balance, the in-memory one may be stale
+        if not self.modify(query={"coins__gte": amount}, dec__coins=amount):
             raise ValueError("Not enough coins")
 
-        self.coins -= amount
-        self.save()
+        return self.coins
 
-    def set_coins(self, amount: int):
-        self.coins = amount
-        self.save()
+    def set_coins(self, amount: int) -> int:
+        self.modify(set__coins=amount)
+        return self.coins
 
     def get_item(self, itemid: str) -> PlayerItem:
         if itemid not in self.inventory:
@@ -1,4 +1,4 @@
-from mongoengine import Document, StringField
+from mongoengine import Document, StringField, IntField, FloatField
 
 
 class Stock(Document):
@@ -9,4 +9,9 @@ class Stock(Document):
     ticker = StringField(required=True)
     company = StringField(required=True)
 
-    meta = {"collection": "stocks"}
+    # Running moments of the hourly log returns, see classes/return_stats.py
+    return_count = IntField(default=0)
+    return_mean = FloatField(default=0.0)
+    return_m2 = FloatField(default=0.0)
+
+    meta = {"collection": "stocks", "indexes": ["ticker"]}
@@ -4,10 +4,16 @@ from mongoengine import Document, StringField, IntField, DateTimeField
 class StockPrice(Document):
     """
     Represents a stock price
+
+    Prices are stored in StockPriceBucket documents, the stock_prices
+    collection only holds rows that have not been migrated yet
     """
 
     ticker = StringField(required=True)
     timestamp = DateTimeField(required=True)
     price = IntField(required=True)
 
-    meta = {"collection": "stock_prices"}
+    meta = {
+        "collection": "stock_prices",
+        "indexes": [("ticker", "timestamp")],
+    }
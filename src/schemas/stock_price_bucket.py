@@ -0,0 +1,27 @@
+from mongoengine import Document, StringField, IntField, DateTimeField, ListField
+
+
+class StockPriceBucket(Document):
+    """
+    All prices of a ticker during one day, as parallel timestamp and price
+    arrays in timestamp order
+
+    Compacted buckets of old days have no arrays and only keep the daily OHLC
+    """
+
+    ticker = StringField(required=True)
+    day = DateTimeField(required=True)  # Midnight at the start of the day
+    count = IntField(required=True, default=0)  # 1 once compacted
+    first_timestamp = DateTimeField()
+    last_timestamp = DateTimeField()
+    open = IntField()
+    high = IntField()
+    low = IntField()
+    close = IntField()
+    timestamps = ListField(DateTimeField())
+    prices = ListField(IntField())
+
+    meta = {
+        "collection": "stock_price_buckets",
+        "indexes": [{"fields": ("ticker", "day"), "unique": True}],
+    }
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterator, List
 
 from db import DB
 from schemas.horse_race import HorseRace
@@ -18,18 +18,29 @@ class HorseRaceService:
     def get_player_horse_races(self, player_id: int) -> List[HorseRace]:
         return self.db.get_horse_races_by_player(player_id)
 
+    def iter_player_horse_races(self, player_id: int) -> Iterator[HorseRace]:
+        return self.db.iter_horse_races_by_player(player_id)
+
     def add_horse_race(self, date, player: int, bet: int, win: int):
         horse_race = HorseRace(date=date, player=player, bet=bet, win=win)
         self.db.add_horse_race(horse_race)
 
     def get_horse_race_stats_by_player(self, player_id: int) -> str:
-        horse_races = self.get_player_horse_races(player_id)
-        if horse_races:
-            total_bet = sum(h.bet for h in horse_races)
-            total_win = sum(h.win for h in horse_races)
-            max_win = max(max((h.win - h.bet) for h in horse_races), 0)
-            max_loss = max(max((h.bet - h.win) for h in horse_races), 0)
-
+        nr_races = 0
+        total_bet = 0
+        total_win = 0
+        max_win = 0
+        max_loss = 0
+
+        # Single pass, the races are streamed rather than loaded into a list
+        for horse_race in self.iter_player_horse_races(player_id):
+            nr_races += 1
+            total_bet += horse_race.bet
+            total_win += horse_race.win
+            max_win = max(max_win, horse_race.win - horse_race.bet)
+            max_loss = max(max_loss, horse_race.bet - horse_race.win)
+
+        if nr_races:
             return (
                 f"Total bet: {total_bet}\n"
                 f"Total win: {total_win}\n"
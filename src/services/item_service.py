@@ -1,68 +1,50 @@
 from typing import List
-import json
 
 from db import DB
 from schemas.item import Item
+from classes.catalog import load_catalog
 import helper
 
 
 class ItemService:
     """
     Service layer for interacting with and getting items from the database
+
+    Reads are served from an in-memory catalog that is loaded at startup
     """
 
     def __init__(self, db: DB, items_path: str):
         self.db = db
-        self.delete_items()
-        self._load_items(items_path)
-
-    def _load_items(self, items_path: str):
-        try:
-            with open(items_path, "r") as file:
-                raw_data = json.load(file)
-                for item_dict in raw_data:
-                    self.add_item(item_dict)
-        except FileNotFoundError:
-            raise ValueError(f"The file '{items_path}' was not found.")
-        except json.JSONDecodeError:
-            raise ValueError(f"Could not decode the contents of '{items_path}'")
+        self.catalog = load_catalog(db, Item, items_path)
 
     def get_item(self, item_id: str) -> Item:
-        if not self.db.has_item(item_id):
+        item = self.catalog.get(item_id)
+
+        if item is None:
             raise ValueError(f"Item with ID {item_id} does not exist")
 
-        return self.db.get_item(item_id)
+        return item
 
     def get_items(self) -> List[Item]:
-        return self.db.get_items()
+        return list(self.catalog.get_all())
 
     def get_purchasable_items(self) -> List[Item]:
-        return [item for item in self.db.get_items() if item.is_purchasable]
+        return list(self.catalog.get_purchasable())
 
     def has_item(self, item_id: str) -> bool:
-        return self.db.has_item(item_id)
-
-    def add_item(self, item_dict: dict):
-        item = Item(**item_dict)
-
-        if self.db.has_item(item.id):
-            raise ValueError("Item already exists")
-
-        self.db.add_item(item)
+        return self.catalog.has(item_id)
 
     def delete_item(self, item_id: str):
         self.db.delete_item(item_id)
-
-    def delete_items(self):
-        self.db.delete_all_items()
+        self.catalog.remove(item_id)
 
     def get_item_by_name(self, item_name: str, fuzzy_match: bool = True) -> Item:
         if fuzzy_match:
-            all_item_names = [i.name for i in self.get_items()]
-            item_name = helper.closest_match(item_name, all_item_names)
+            item_name = helper.closest_match(item_name, self.catalog.get_names())
+
+        item = self.catalog.get_by_name(item_name)
 
-        for item in self.get_items():
-            if item.name == item_name:
-                return item
+        if item is None:
+            raise ValueError("Item not found")
 
-        raise ValueError("Item not found")
+        return item
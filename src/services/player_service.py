@@ -1,35 +1,95 @@
-from typing import List
+from typing import Dict, List
 
 from db import DB
+from async_db import AsyncDB
 from schemas.player import Player
+from schemas.modifier import Modifier
 
 
 class PlayerService:
     """
     Service layer for interacting with and getting players from the database
+
+    Queries go through AsyncDB, so commands don't block the event loop while
+    waiting on the database
     """
 
-    def __init__(self, db: DB):
-        self.db = db
+    def __init__(self, db: DB, async_db: AsyncDB):
+        self.db = async_db
+        db.recover_coin_transfers()
 
-    def get_player(self, player_id: int) -> Player:
-        if not self.db.has_player(player_id):
-            self.add_player(player_id)
+    async def get_player(self, player_id: int) -> Player:
+        return await self.db.get_or_create_player(player_id)
 
-        return self.db.get_player(player_id)
+    async def get_players(self, fields: List[str] = None) -> List[Player]:
+        return await self.db.get_players(fields=fields)
 
-    def get_players(self) -> List[Player]:
-        return self.db.get_players()
+    async def get_coin_balances(self) -> Dict[int, int]:
+        """
+        Gets the coins of every player, keyed by player ID, without loading
+        the rest of the player documents
+        """
+        players = await self.db.get_players_as_dicts(["coins"])
+        return {player["_id"]: player["coins"] for player in players}
 
-    def has_player(self, player_id: int) -> Player:
-        return self.db.has_player(player_id)
+    async def has_player(self, player_id: int) -> Player:
+        return await self.db.has_player(player_id)
 
-    def add_player(self, player_id: int) -> Player:
-        if self.db.has_player(player_id):
+    async def add_player(self, player_id: int) -> Player:
+        if await self.db.has_player(player_id):
             raise ValueError("Player already exists")
 
         player = Player(id=player_id)
-        self.db.add_player(player)
+        await self.db.add_player(player)
+
+    async def add_coins(self, player_id: int, amount: int) -> int:
+        if amount < 0:
+            raise ValueError("Can't add negative coins")
+
+        balance = await self.db.inc_player_coins(player_id, amount)
+
+        if balance is None:
+            raise ValueError(f"Player with ID {player_id} does not exist")
+
+        return balance
+
+    async def remove_coins(self, player_id: int, amount: int) -> int:
+        if amount < 0:
+            raise ValueError("Can't remove negative coins")
+
+        balance = await self.db.inc_player_coins(player_id, -amount)
+
+        if balance is None:
+            raise ValueError("Not enough coins")
+
+        return balance
+
+    async def settle_coins(self, deltas: Dict[int, int]) -> Dict[int, int]:
+        """
+        Applies coin deltas to several players at once, e.g. a transfer or a
+        payout. Either every delta is applied or none are, raising an
+        InsufficientCoinsError or a PlayerNotFoundError
+
+        Returns the new balance of each player in deltas
+        """
+        return await self.db.settle_player_coins(deltas)
+
+    async def reward_all_players(
+        self,
+        amount: int,
+        boosted_amount: int,
+        boost_modifier: Modifier,
+        grant_modifier_id: str,
+    ) -> int:
+        """
+        Gives every player coins, boosted_amount for those with an active
+        boost_modifier, and a stack of the granted modifier
+
+        Returns the number of players rewarded
+        """
+        return await self.db.reward_all_players(
+            amount, boosted_amount, boost_modifier, grant_modifier_id
+        )
 
-    def delete_player(self, player_id: int):
-        self.db.delete_player(player_id)
+    async def delete_player(self, player_id: int):
+        await self.db.delete_player(player_id)
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 from db import DB
 from schemas.roulette import Roulette
@@ -18,21 +18,22 @@ class RouletteService:
     def get_roulettes_by_player(self, player_id: int) -> List[Roulette]:
         return self.db.get_roulettes_by_player(player_id)
 
+    def iter_roulettes_by_player(self, player_id: int) -> Iterator[Roulette]:
+        return self.db.iter_roulettes_by_player(player_id)
+
     def add_roulette(self, date, players: Dict[str, int], winner: int):
         roulette = Roulette(date=date, players=players, winner=winner)
         self.db.add_roulette(roulette)
 
     def get_roulette_stats_by_player(self, player_id: int) -> str:
-        roulettes = self.get_roulettes_by_player(player_id)
+        nr_roulettes = 0
         total_bet = 0
         total_win = 0
         max_win = 0
         max_loss = 0
 
-        if not roulettes:
-            return "No Roulette data"
-
-        for roulette in roulettes:
+        for roulette in self.iter_roulettes_by_player(player_id):
+            nr_roulettes += 1
             player_bet = roulette.players.get(str(player_id), 0)
             total_bet += player_bet
 
@@ -43,6 +44,9 @@ class RouletteService:
             else:
                 max_loss = max(max_loss, player_bet)
 
+        if not nr_roulettes:
+            return "No Roulette data"
+
         return (
             f"Total bet: {total_bet}\n"
             f"Total win: {total_win}\n"
@@ -1,12 +1,33 @@
 import json
+import asyncio
 import datetime
 import logging
-from typing import List
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
 
 from db import DB
+from const import (
+    HOURLY_HISTORY_MAX_DAYS,
+    HOURLY_PRICE_RETENTION_DAYS,
+    STOCK_MARKET_CORRELATION,
+    CATCH_UP_CHUNK_HOURS,
+    CHART_CACHE_SIZE,
+    CHART_WORKERS,
+    CHART_MAX_POINTS,
+)
 from schemas.stock import Stock
 from schemas.stock_price import StockPrice
 from classes.stock_sim import StockSim
+from classes.price_seed_store import PriceSeedStore
+from classes.return_stats import RunningMoments, get_log_returns
+from classes.price_cache import LatestPriceCache
+from classes.market_snapshot import StockSnapshot
+from classes.catch_up_progress import CatchUpProgress
+from classes.chart_cache import ChartCache
+from classes.stock_chart import render_stock_chart_with_stats
 
 
 class StockService:
@@ -17,8 +38,30 @@ class StockService:
 
     def __init__(self, db: DB):
         self.db = db
-        self.stock_sim = StockSim()
+        self.stock_sim = StockSim(PriceSeedStore("data/stock_seeds"))
+        self.migrate_stock_prices()
         self.handle_initialize_stocks()
+        self.price_cache = LatestPriceCache()
+        self.price_cache.load(self.db.get_current_stock_prices())
+        self.catch_up_progress = CatchUpProgress()
+        self.chart_cache = ChartCache(CHART_CACHE_SIZE)
+        # Spawned, forking the bot's threads and sockets is not safe
+        self.chart_executor = ProcessPoolExecutor(
+            max_workers=CHART_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def migrate_stock_prices(self):
+        """
+        Moves prices left in the old one document per price collection into
+        buckets. Runs before the initial prices are simulated, which would
+        otherwise hide the old history from the migration
+        """
+        if not self.db.has_legacy_stock_prices():
+            return
+
+        logging.info("Migrating stock prices to buckets...")
+        migrated = self.db.migrate_stock_prices()
+        logging.info("Migrated %d stock prices", migrated)
 
     def handle_initialize_stocks(self):
         """
@@ -49,11 +92,9 @@ class StockService:
                     stock_prices_df = self.stock_sim.simulate_initial_stock_prices(
                         real_ticker
                     )
-                    stock_prices = self.stock_sim.dataframe_to_stock_prices(
-                        ticker, stock_prices_df
+                    self.db.insert_stock_price_arrays(
+                        {ticker: self.stock_sim.dataframe_to_arrays(stock_prices_df)}
                     )
-                    for stock_price in stock_prices:
-                        self.db.add_stock_price(stock_price)
 
     def add_stock(self, ticker: str, company: str):
         if self.db.has_stock(ticker):
@@ -62,27 +103,218 @@ class StockService:
         stock = Stock(ticker=ticker, company=company)
         self.db.add_stock(stock)
 
-    def get_stock_price_plot(self, stock: Stock, stock_prices: List[StockPrice]):
-        if not stock_prices:
-            raise ValueError(f"No data to plot for ${stock.ticker}")
+    async def get_stock_price_chart(self, stock: Stock, days: int = None) -> bytes:
+        """
+        Chart image of the prices of the last days, or of all prices, in the
+        CHART_FORMAT format. Charts are rendered in a worker process and cached
+        until the stock's next price
+        """
+        latest_price = self.price_cache.get(stock.ticker)
+        latest_timestamp = latest_price.timestamp if latest_price else None
+        key = (stock.ticker, days, latest_timestamp)
 
-        return self.stock_sim.plot_stock_prices(stock, stock_prices)
+        chart = self.chart_cache.get(key)
+        if chart is not None:
+            return chart
 
-    def simulate_next_stock_prices(self, stock: Stock):
-        curr_stock_prices = self.get_stock_prices(stock.ticker)
-        curr_stock_prices_df = self.stock_sim.stock_prices_to_dataframe(
-            curr_stock_prices
+        start_date = end_date = None
+        if days:
+            end_date = datetime.datetime.now()
+            start_date = end_date - datetime.timedelta(days=days)
+
+        stock_prices_df = await asyncio.to_thread(
+            self.get_stock_price_plot_data, stock, start_date, end_date
         )
 
-        next_stock_prices_df = self.stock_sim.simulate_next_stock_price(
-            curr_stock_prices_df
+        title = f"{stock.company} - ${stock.ticker}"
+        chart, encode_time = await asyncio.get_running_loop().run_in_executor(
+            self.chart_executor, render_stock_chart_with_stats, title, stock_prices_df
+        )
+        logging.debug(
+            "Encoded %s chart in %.1fms, %d bytes",
+            stock.ticker,
+            encode_time * 1000,
+            len(chart),
         )
-        next_stock_prices = self.stock_sim.dataframe_to_stock_prices(
-            stock.ticker, next_stock_prices_df
+
+        self.chart_cache.put(key, chart)
+        return chart
+
+    def get_stock_price_plot_data(
+        self,
+        stock: Stock,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        max_points: int = CHART_MAX_POINTS,
+    ) -> pd.DataFrame:
+        """
+        Gets at most max_points prices to plot in the date range, or of all
+        prices without a range. Ranges longer than HOURLY_HISTORY_MAX_DAYS get
+        one price per day. Anything still longer than max_points is
+        downsampled in the database
+        """
+        if start_date and end_date:
+            nr_days = (end_date - start_date).days + 1
+        else:
+            nr_days = self.db.count_stock_prices(
+                stock.ticker, start_date, end_date, daily=True
+            )
+        daily = nr_days > HOURLY_HISTORY_MAX_DAYS
+
+        if daily:
+            downsample = nr_days > max_points
+        else:
+            # Prices are hourly, only count them when the days could hold too many
+            downsample = nr_days * 24 > max_points and (
+                self.db.count_stock_prices(stock.ticker, start_date, end_date)
+                > max_points
+            )
+
+        if downsample:
+            stock_prices = self.db.get_downsampled_stock_prices(
+                stock.ticker, max_points, start_date, end_date, daily
+            )
+            stock_prices_df = self.stock_sim.stock_prices_to_dataframe(stock_prices)
+        elif start_date and end_date:
+            stock_prices_df = self.get_stock_price_dataframe_in_date_range(
+                stock.ticker, start_date, end_date, daily
+            )
+        else:
+            stock_prices_df = self.get_stock_price_dataframe(stock.ticker, daily)
+
+        if stock_prices_df.empty:
+            raise ValueError(f"No data to plot for ${stock.ticker}")
+
+        return stock_prices_df
+
+    def catch_up_stock_prices(
+        self, stocks: List[Stock], chunk_hours: int = CATCH_UP_CHUNK_HOURS
+    ) -> Iterator[CatchUpProgress]:
+        """
+        Simulates and stores the prices since the last tick in chunks of at
+        most chunk_hours. Yields the progress after each chunk, so callers can
+        hand back control between chunks
+        """
+        last_prices = [self.get_last_stock_price(stock.ticker) for stock in stocks]
+        timestamps = [sp.timestamp for sp in last_prices if sp is not None]
+
+        if not timestamps:
+            return
+
+        end_date = datetime.datetime.now()
+        self.catch_up_progress.start(min(timestamps), end_date)
+
+        if end_date - min(timestamps) > datetime.timedelta(hours=chunk_hours):
+            logging.info("Catching up stock prices since %s", min(timestamps))
+
+        chunk = datetime.timedelta(hours=chunk_hours)
+        chunk_end = min(timestamps)
+        try:
+            while chunk_end < end_date:
+                chunk_end = min(chunk_end + chunk, end_date)
+                nr_prices = self.simulate_next_stock_prices(stocks, chunk_end)
+                self.catch_up_progress.advance(chunk_end, nr_prices)
+
+                logging.debug(
+                    "Simulated stock prices until %s, %.0f%% caught up",
+                    chunk_end,
+                    self.catch_up_progress.get_percent_done(),
+                )
+                yield self.catch_up_progress
+        finally:
+            # Also reached when the caller stops iterating or a chunk fails
+            self.catch_up_progress.finish()
+            logging.debug(
+                "Added %s prices for %s stocks",
+                self.catch_up_progress.nr_prices,
+                len(stocks),
+            )
+
+    def simulate_next_stock_prices(
+        self, stocks: List[Stock], end_date: datetime.datetime = None
+    ) -> int:
+        """
+        Simulates and stores the prices since the last tick of all stocks in
+        one batch, until end_date or now. Only the last prices and the running
+        return moments of the stocks are read
+
+        Returns the number of prices added
+        """
+        simulated_stocks = []
+        last_prices = []
+
+        for stock in stocks:
+            last_price = self.get_last_stock_price(stock.ticker)
+
+            if last_price is not None:
+                simulated_stocks.append(stock)
+                last_prices.append(last_price)
+
+        moments = [self.get_return_moments(stock) for stock in simulated_stocks]
+
+        correlation = None
+        if STOCK_MARKET_CORRELATION:
+            correlation = self.stock_sim.get_market_correlation(
+                len(simulated_stocks), STOCK_MARKET_CORRELATION
+            )
+
+        batch = self.stock_sim.simulate_next_stock_prices(
+            last_prices, moments, end_date, correlation
+        )
+
+        if not len(batch):
+            return 0
+
+        self.db.add_stock_price_arrays(batch.to_arrays())
+
+        # Moments of the prices as stored, which truncates them to integers
+        for i, stock in enumerate(simulated_stocks):
+            prices = batch.get_prices(i).astype(np.int64)
+            moments[i].update(get_log_returns(prices, int(last_prices[i].price)))
+        self.set_return_moments(simulated_stocks, moments)
+
+        for stock_price in batch.get_last_prices():
+            self.price_cache.update(stock_price)
+            self.chart_cache.invalidate(stock_price.ticker)
+
+        return len(batch)
+
+    def get_last_stock_price(self, ticker: str) -> Optional[StockPrice]:
+        last_price = self.price_cache.get(ticker)
+        if last_price is None:
+            last_price = self.db.get_current_stock_price(ticker)
+        return last_price
+
+    def get_return_moments(self, stock: Stock) -> RunningMoments:
+        """
+        Gets the running return moments of the stock. Stocks without moments
+        get them from their hourly price history once
+        """
+        if stock.return_count:
+            return RunningMoments(
+                stock.return_count, stock.return_mean, stock.return_m2
+            )
+
+        # Only the uncompacted hourly prices, daily closes would skew the returns
+        now = datetime.datetime.now()
+        start_date = now - datetime.timedelta(days=HOURLY_PRICE_RETENTION_DAYS)
+        stock_prices_df = self.get_stock_price_dataframe_in_date_range(
+            stock.ticker, start_date, now
         )
 
-        for stock_price in next_stock_prices:
-            self.db.add_stock_price(stock_price)
+        moments = self.stock_sim.get_return_moments(stock_prices_df)
+        self.set_return_moments([stock], [moments])
+        return moments
+
+    def set_return_moments(self, stocks: List[Stock], moments: List[RunningMoments]):
+        for stock, stock_moments in zip(stocks, moments):
+            stock.return_count = stock_moments.count
+            stock.return_mean = stock_moments.mean
+            stock.return_m2 = stock_moments.m2
+
+        self.db.update_stock_return_moments(
+            {stock.ticker: (m.count, m.mean, m.m2) for stock, m in zip(stocks, moments)}
+        )
 
     def get_stock(self, ticker) -> Stock:
         if not self.db.has_stock(ticker):
@@ -97,10 +329,64 @@ class StockService:
         return self.db.get_stocks()
 
     def get_current_stock_price(self, ticker: str) -> float:
-        return self.db.get_current_stock_price(ticker).price
+        stock_price = self.price_cache.get(ticker)
+
+        if stock_price is None:
+            stock_price = self.db.get_current_stock_price(ticker)
+
+            if stock_price is None:
+                raise ValueError(f"No prices for stock with ticker {ticker}")
+
+            self.price_cache.update(stock_price)
+
+        return stock_price.price
+
+    def get_market_snapshot(self) -> List[StockSnapshot]:
+        """
+        Gets the current price and 24 hour and one week change of every stock
+        """
+        stocks = self.get_all_stocks()
+        now = datetime.datetime.now()
+        date_24_hrs = now - datetime.timedelta(days=1)
+        date_1_week = now - datetime.timedelta(days=7)
+        market_prices = self.db.get_market_prices(
+            [stock.ticker for stock in stocks], date_24_hrs, date_1_week
+        )
+
+        # No recent prices, e.g. after a long downtime
+        missing = [s.ticker for s in stocks if s.ticker not in market_prices]
+        if missing:
+            cutoffs = {"current": now, "day": date_24_hrs, "week": date_1_week}
+            stock_prices = self.db.get_stock_prices_at(missing, cutoffs)
 
-    def get_stock_price_by_date(self, ticker: str, date: datetime) -> float:
-        return self.db.get_stock_price_by_date(ticker, date).price
+            for ticker, prices in stock_prices.items():
+                market_prices[ticker] = {
+                    key: stock_price.price if stock_price else None
+                    for key, stock_price in prices.items()
+                }
+
+        snapshots = []
+        for stock in stocks:
+            prices = market_prices[stock.ticker]
+
+            if prices["current"] is None:
+                continue
+
+            snapshots.append(
+                StockSnapshot(stock, prices["current"], prices["day"], prices["week"])
+            )
+        return snapshots
+
+    def get_stock_price_at(self, ticker: str, date: datetime) -> float:
+        """
+        Gets the latest price of the ticker at or before date
+        """
+        stock_price = self.db.get_stock_price_at(ticker, date)
+
+        if stock_price is None:
+            raise ValueError(f"No price for ${ticker} at or before {date}")
+
+        return stock_price.price
 
     def get_stock_price_in_date_range(
         self, ticker: str, start_date: datetime, end_date: datetime
@@ -110,5 +396,40 @@ class StockService:
     def get_stock_prices(self, ticker: str) -> List[StockPrice]:
         return self.db.get_stock_price_history(ticker)
 
+    def get_stock_price_dataframe(
+        self, ticker: str, daily: bool = False
+    ) -> pd.DataFrame:
+        count = self.db.count_stock_prices(ticker, daily=daily)
+        return self.stock_sim.stock_prices_to_dataframe(
+            self.db.iter_stock_price_history(ticker, daily=daily), count
+        )
+
+    def get_stock_price_dataframe_in_date_range(
+        self, ticker: str, start_date: datetime, end_date: datetime, daily: bool = False
+    ) -> pd.DataFrame:
+        count = self.db.count_stock_prices(ticker, start_date, end_date, daily)
+        return self.stock_sim.stock_prices_to_dataframe(
+            self.db.iter_stock_price_in_date_range(
+                ticker, start_date, end_date, daily=daily
+            ),
+            count,
+        )
+
+    def compact_stock_prices(self) -> int:
+        """
+        Compacts the prices of days older than HOURLY_PRICE_RETENTION_DAYS to
+        daily OHLC
+        """
+        cutoff = datetime.datetime.now() - datetime.timedelta(
+            days=HOURLY_PRICE_RETENTION_DAYS
+        )
+        return self.db.compact_stock_prices(self.db.get_bucket_day(cutoff))
+
+    def close(self):
+        """
+        Stops the chart worker processes
+        """
+        self.chart_executor.shutdown(cancel_futures=True)
+
     def has_stock_price(self, ticker: str) -> bool:
         return self.db.has_stock_price(ticker)
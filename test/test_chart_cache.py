@@ -0,0 +1,38 @@
+from src.classes.chart_cache import ChartCache
+
+
+def test_least_recently_used_chart_is_evicted():
+    cache = ChartCache(max_size=2)
+    cache.put(("ABC", 7), b"abc")
+    cache.put(("DEF", 7), b"def")
+
+    cache.get(("ABC", 7))
+    cache.put(("GHI", 7), b"ghi")
+
+    assert cache.get(("DEF", 7)) is None
+    assert cache.get(("ABC", 7)) == b"abc"
+    assert cache.get(("GHI", 7)) == b"ghi"
+
+
+def test_charts_are_keyed_by_the_whole_key():
+    cache = ChartCache(max_size=4)
+    cache.put(("ABC", 7), b"week")
+    cache.put(("ABC", 30), b"month")
+
+    assert cache.get(("ABC", 7)) == b"week"
+    assert cache.get(("ABC", 30)) == b"month"
+    assert cache.get(("ABC", 365)) is None
+    assert cache.get_stats() == {"size": 2, "hits": 2, "misses": 1}
+
+
+def test_invalidate_only_drops_the_charts_of_the_ticker():
+    cache = ChartCache(max_size=4)
+    cache.put(("ABC", 7), b"abc week")
+    cache.put(("ABC", 30), b"abc month")
+    cache.put(("DEF", 7), b"def week")
+
+    cache.invalidate("ABC")
+
+    assert cache.get(("ABC", 7)) is None
+    assert cache.get(("ABC", 30)) is None
+    assert cache.get(("DEF", 7)) == b"def week"
@@ -0,0 +1,100 @@
+import datetime
+
+import numpy as np
+
+from src.db import COMPACTED_FIELDS, DB
+
+DAY = datetime.datetime(2024, 3, 1)
+
+
+def hours(*offsets: int):
+    return [DAY + datetime.timedelta(hours=offset) for offset in offsets]
+
+
+def test_bucket_price_at_takes_the_latest_point_at_or_before():
+    bucket = {"ticker": "ABC", "timestamps": hours(0, 1, 2), "prices": [10, 11, 12]}
+
+    stock_price = DB._get_bucket_price_at(bucket, DAY + datetime.timedelta(hours=1.5))
+
+    assert stock_price.timestamp == DAY + datetime.timedelta(hours=1)
+    assert stock_price.price == 11
+
+
+def test_compacted_bucket_price_at_only_closes_once_ended():
+    first_timestamp, last_timestamp = hours(0, 23)
+    bucket = {
+        "ticker": "ABC",
+        "first_timestamp": first_timestamp,
+        "open": 10,
+        "last_timestamp": last_timestamp,
+        "close": 12,
+    }
+
+    during = DB._get_bucket_price_at(bucket, DAY + datetime.timedelta(hours=12))
+    after = DB._get_bucket_price_at(bucket, last_timestamp)
+
+    assert (during.timestamp, during.price) == (first_timestamp, 10)
+    assert (after.timestamp, after.price) == (last_timestamp, 12)
+
+
+def test_prices_are_split_into_day_buckets():
+    timestamps = np.array(hours(22, 23, 24, 25), dtype="datetime64[us]")
+    prices = np.array([10.4, 11.6, 9.0, 12.0])
+
+    buckets = list(DB._split_into_buckets({"ABC": (timestamps, prices)}))
+
+    next_day = DAY + datetime.timedelta(days=1)
+    assert buckets == [
+        ("ABC", DAY, hours(22, 23), [10, 11]),
+        ("ABC", next_day, hours(24, 25), [9, 12]),
+    ]
+
+
+def ohlc(bucket: dict):
+    return bucket["open"], bucket["high"], bucket["low"], bucket["close"]
+
+
+def test_new_bucket_holds_the_daily_ohlc():
+    bucket = DB._new_bucket("ABC", DAY, hours(0, 1, 2, 3), [10, 14, 8, 12])
+
+    assert ohlc(bucket) == (10, 14, 8, 12)
+    assert bucket["count"] == 4
+    assert [bucket["first_timestamp"], bucket["last_timestamp"]] == hours(0, 3)
+
+
+def test_compacted_bucket_keeps_the_daily_ohlc():
+    bucket = DB._new_bucket("ABC", DAY, hours(0, 1, 2, 3), [10, 14, 8, 12])
+    for field in COMPACTED_FIELDS:
+        del bucket[field]
+
+    assert ohlc(bucket) == (10, 14, 8, 12)
+    stock_prices = list(DB._unpack_bucket(bucket))
+    assert [(sp.timestamp, sp.price) for sp in stock_prices] == [(hours(3)[0], 12)]
+
+
+def test_downsampling_keeps_first_low_high_and_last():
+    first, low, high, last, single = hours(0, 1, 2, 3, 4)
+
+    def point(timestamp: datetime.datetime, price: int):
+        return {"timestamp": timestamp, "price": price}
+
+    rows = [
+        {
+            "first": point(first, 10),
+            "low": point(low, 5),
+            "high": point(high, 20),
+            "last": point(last, 12),
+        },
+        # A group of one price is one point
+        {key: point(single, 11) for key in ("first", "low", "high", "last")},
+    ]
+
+    stock_prices = DB._get_downsampled_prices("ABC", rows)
+
+    assert [(sp.timestamp, sp.price) for sp in stock_prices] == [
+        (first, 10),
+        (low, 5),
+        (high, 20),
+        (last, 12),
+        (single, 11),
+    ]
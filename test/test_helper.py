@@ -40,3 +40,12 @@ def test_puzzle_reward():
     complete_time = 301
     score = helper.get_puzzle_reward(day, complete_time)
     assert score == 40
+
+
+def test_get_content_hash():
+    data = [{"id": "lock", "price": 30}, {"id": "ninja_lesson", "price": 100}]
+    reordered = [{"price": 30, "id": "lock"}, {"price": 100, "id": "ninja_lesson"}]
+    assert helper.get_content_hash(data) == helper.get_content_hash(reordered)
+
+    changed = [{"id": "lock", "price": 35}, {"id": "ninja_lesson", "price": 100}]
+    assert helper.get_content_hash(data) != helper.get_content_hash(changed)
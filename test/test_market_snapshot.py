@@ -0,0 +1,17 @@
+import pytest
+
+from src.classes.market_snapshot import get_percent_change
+
+
+def test_percent_change():
+    assert get_percent_change(110, 100) == pytest.approx(10)
+    assert get_percent_change(50, 100) == pytest.approx(-50)
+
+
+@pytest.mark.parametrize("previous_price", [None, 0])
+def test_missing_or_zero_previous_price_is_no_change(previous_price):
+    assert get_percent_change(100, previous_price) == 0
+
+
+def test_price_dropping_to_zero_is_a_full_loss():
+    assert get_percent_change(0, 100) == pytest.approx(-100)
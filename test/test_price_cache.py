@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from src.classes.price_cache import LatestPriceCache
+from src.schemas.stock_price import StockPrice
+
+NOW = datetime(2024, 3, 1, 12)
+
+
+def stock_price(ticker: str, hours_ago: int, price: int) -> StockPrice:
+    return StockPrice(
+        ticker=ticker, timestamp=NOW - timedelta(hours=hours_ago), price=price
+    )
+
+
+def test_update_keeps_the_latest_price():
+    cache = LatestPriceCache()
+    cache.update(stock_price("ABC", 1, 100))
+    cache.update(stock_price("ABC", 0, 110))
+    cache.update(stock_price("ABC", 2, 90))
+
+    assert cache.get("ABC").price == 110
+    assert cache.get("DEF") is None
+
+
+def test_load_replaces_every_cached_price():
+    cache = LatestPriceCache()
+    cache.update(stock_price("ABC", 0, 100))
+
+    cache.load([stock_price("DEF", 1, 50), stock_price("DEF", 0, 55)])
+
+    assert cache.get("ABC") is None
+    assert cache.get("DEF").price == 55
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.classes.return_stats import RunningMoments, clamp_prices, get_log_returns
+
+
+def full_recomputation(prices: np.ndarray):
+    # The statistics monte_carlo_simulation used to recompute every tick
+    df = pd.DataFrame({"Price": prices})
+    df["Price"] = df["Price"].apply(lambda x: 1 if x <= 0 else x)
+    log_returns = np.log(1 + df["Price"].pct_change()).fillna(0)
+    return log_returns.mean(), log_returns.std()
+
+
+def test_running_moments_match_full_recomputation():
+    rng = np.random.default_rng(0)
+    prices = np.round(100 * np.cumprod(1 + rng.normal(0, 0.02, 2000)))
+    prices[[10, 500]] = [0, -3]
+
+    moments = RunningMoments().update(get_log_returns(prices[:720]))
+    previous_price = prices[719]
+    for start in range(720, len(prices), 7):
+        batch = prices[start : start + 7]
+        moments.update(get_log_returns(batch, previous_price))
+        previous_price = batch[-1]
+
+    mean, std = full_recomputation(prices)
+    assert moments.count == len(prices)
+    assert moments.get_mean() == pytest.approx(mean, rel=1e-9, abs=1e-12)
+    assert moments.get_std() == pytest.approx(std, rel=1e-9)
+
+
+def test_running_moments_few_values():
+    moments = RunningMoments()
+    assert moments.get_std() == 0.0
+
+    moments.update(np.array([0.5]))
+    assert moments.get_mean() == 0.5
+    assert moments.get_std() == 0.0
+
+    moments.update(np.array([]))
+    assert moments.count == 1
+
+
+def test_only_non_positive_prices_are_clamped():
+    assert clamp_prices([-3, 0, 0.5, 2]).tolist() == [1, 1, 0.5, 2]
+
+    log_returns = get_log_returns(np.array([0.5, 0.25]), previous_price=0)
+    assert log_returns == pytest.approx(np.log([0.5, 0.5]))
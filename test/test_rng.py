@@ -0,0 +1,45 @@
+import pytest
+
+from src import rng
+
+
+@pytest.fixture(autouse=True)
+def reset_seed(monkeypatch):
+    monkeypatch.delenv("WAPO_SEED", raising=False)
+    rng.set_seed(None)
+    yield
+    rng.set_seed(None)
+
+
+def draw(subsystem: str):
+    return (
+        [rng.get_random(subsystem).random() for _ in range(3)],
+        rng.get_generator(subsystem).standard_normal(3).tolist(),
+    )
+
+
+def test_wapo_seed_replays_every_subsystem(monkeypatch):
+    monkeypatch.setenv("WAPO_SEED", "1234")
+    first = draw("duel"), draw("stock_sim")
+
+    rng.set_seed(None)
+    second = draw("duel"), draw("stock_sim")
+
+    assert rng.get_seed() == 1234
+    assert first == second
+
+
+def test_subsystems_get_their_own_streams():
+    rng.set_seed(1234)
+
+    assert draw("duel") != draw("roulette")
+
+
+def test_draws_in_one_subsystem_do_not_shift_another():
+    rng.set_seed(1234)
+    expected = draw("roulette")
+
+    rng.set_seed(1234)
+    draw("duel")
+
+    assert draw("roulette") == expected
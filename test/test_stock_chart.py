@@ -0,0 +1,20 @@
+import pytest
+
+from src.classes.stock_chart import _get_ticks
+
+
+@pytest.mark.parametrize(
+    "low, high, expected",
+    [
+        (0, 100, [0, 20, 40, 60, 80, 100]),
+        (3, 97, [0, 20, 40, 60, 80, 100]),
+        (1234, 1299, [1220, 1240, 1260, 1280, 1300]),
+        (0.012, 0.087, [0, 0.02, 0.04, 0.06, 0.08, 0.1]),
+    ],
+)
+def test_ticks_are_round_steps_covering_the_range(low, high, expected):
+    assert _get_ticks(low, high) == pytest.approx(expected)
+
+
+def test_flat_range_is_widened():
+    assert _get_ticks(50, 50) == pytest.approx([49, 49.5, 50, 50.5, 51])
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.classes.return_stats import RunningMoments
+from src.classes.stock_sim import StockSim
+from src.schemas.stock_price import StockPrice
+
+END_DATE = datetime(2024, 3, 1, 12)
+HOURLY_STD = 0.01
+
+
+def simulate(hours_since_last, correlation=None, seed=0):
+    last_prices = [
+        StockPrice(ticker=f"T{i}", timestamp=END_DATE - timedelta(hours=h), price=100)
+        for i, h in enumerate(hours_since_last)
+    ]
+    # Mean 0 and a standard deviation of HOURLY_STD
+    moments = [RunningMoments(101, 0.0, 100 * HOURLY_STD**2) for _ in last_prices]
+
+    stock_sim = StockSim(rng=np.random.default_rng(seed))
+    return stock_sim.simulate_next_stock_prices(
+        last_prices, moments, END_DATE, correlation
+    )
+
+
+def test_every_ticker_gets_its_own_hours():
+    batch = simulate([5, 2, 0])
+
+    assert batch.counts.tolist() == [5, 2, 0]
+    assert len(batch) == 7
+
+    expected = np.array(
+        [END_DATE - timedelta(hours=h) for h in (1, 0)], dtype="datetime64[us]"
+    )
+    np.testing.assert_array_equal(batch.get_timestamps(1), expected)
+
+
+def test_rows_are_masked_after_their_count():
+    batch = simulate([5, 2, 0])
+
+    assert batch.prices.shape == (3, 5)
+    assert len(batch.get_prices(1)) == 2
+    assert list(batch.to_arrays()) == ["T0", "T1"]
+
+    last_prices = batch.get_last_prices()
+    assert [sp.ticker for sp in last_prices] == ["T0", "T1"]
+    assert all(sp.timestamp == END_DATE for sp in last_prices)
+
+
+def test_seeded_generator_replays_the_same_prices():
+    first, second = simulate([24, 12], seed=7), simulate([24, 12], seed=7)
+
+    np.testing.assert_array_equal(first.prices, second.prices)
+
+
+def test_correlation_is_applied_to_the_returns():
+    rho = 0.8
+    correlation = StockSim().get_market_correlation(2, rho)
+    batch = simulate([20_000, 20_000], correlation)
+
+    returns = batch.prices[:, 1:] / batch.prices[:, :-1] - 1
+
+    assert np.corrcoef(returns)[0, 1] == pytest.approx(rho, abs=0.03)
+
+
+def test_correlation_that_is_not_positive_definite_is_rejected():
+    correlation = StockSim().get_market_correlation(3, -0.9)
+
+    with pytest.raises(ValueError):
+        simulate([5, 5, 5], correlation)